@@ -121,6 +121,24 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MAX_QUESTION_PER_QUIZ: int = 10
+MAX_ANSWER_PER_QUESTION: int = 5
+
+# Queue quiz submissions for the `grade_submissions` worker instead of
+# grading them within the request
+ASYNC_SUBMISSIONS = int(os.environ.get("ASYNC_SUBMISSIONS", 0))
+
+# Route taking quizzes, reading results and public quizzes to async views,
+# for deployments served by an ASGI server
+ASYNC_VIEWS = int(os.environ.get("ASYNC_VIEWS", 0))
+
+# Paginated listings estimated to hold more rows than this report the
+# planner estimate instead of running an exact COUNT
+PAGINATION_EXACT_COUNT_THRESHOLD = int(
+    os.environ.get("PAGINATION_EXACT_COUNT_THRESHOLD", 10000)
+)
+
+# Quiz takers read and graded at a time when exporting results
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
 
 REST_USE_JWT = True
 
@@ -132,7 +150,7 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "quiz.pagination.EstimatedCountPagination",
     "PAGE_SIZE": 10,
 }
 
@@ -151,4 +169,18 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 REDIS_HOST = os.environ.get("REDIS_HOST")
 
-REDIS_PORT = os.environ.get("REDIS_PORT")
\ No newline at end of file
+REDIS_PORT = os.environ.get("REDIS_PORT")
+
+# Seconds a cached score is kept in Redis
+SCORE_CACHE_TTL = int(os.environ.get("SCORE_CACHE_TTL", 60 * 60 * 24))
+
+# Entries and seconds kept by the in-process cache in front of Redis. Quiz
+# generations are kept for a shorter time as other workers may bump them.
+SCORE_LOCAL_CACHE_SIZE = int(os.environ.get("SCORE_LOCAL_CACHE_SIZE", 10000))
+
+SCORE_LOCAL_CACHE_TTL = float(os.environ.get("SCORE_LOCAL_CACHE_TTL", 60))
+
+SCORE_GENERATION_LOCAL_TTL = float(os.environ.get("SCORE_GENERATION_LOCAL_TTL", 2))
+
+# Rendered public quizzes kept in process for when Redis cannot be reached
+SNAPSHOT_LOCAL_CACHE_SIZE = int(os.environ.get("SNAPSHOT_LOCAL_CACHE_SIZE", 1000))
\ No newline at end of file
@@ -1,9 +1,21 @@
 from django.contrib import admin
 
-from quiz.models import Answer, Question, Quiz, QuizTaken, UserAnswer
+from quiz.models import (
+    Answer,
+    AnswerStatistics,
+    Question,
+    QuestionStatistics,
+    Quiz,
+    QuizTaken,
+    Submission,
+    UserAnswer,
+)
 
 admin.site.register(Quiz)
 admin.site.register(Question)
 admin.site.register(Answer)
 admin.site.register(QuizTaken)
-admin.site.register(UserAnswer)
\ No newline at end of file
+admin.site.register(UserAnswer)
+admin.site.register(Submission)
+admin.site.register(QuestionStatistics)
+admin.site.register(AnswerStatistics)
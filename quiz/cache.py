@@ -0,0 +1,375 @@
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from quiz.utils import RedisClient, get_async_redis_client
+
+
+class LocalCache:
+    """
+    A bounded in-process LRU cache whose entries expire after `ttl` seconds
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._data.pop(key, None)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        if value is None:
+            return
+
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class ScoreCache:
+    """
+    Scores cached in Redis, in one hash per quiz and answer-key generation.
+
+    The hash of a quiz holds a `total.<user>` field per user and an
+    `answer.<question>.<user>` field per answered question, each encoded as
+    an 8 byte float. The generation of a quiz is part of the hash key and is
+    bumped whenever its questions or answers change, so every score cached
+    against the previous answer key stops being read at once and the old
+    hash is left to expire as a unit.
+
+    Reads go through an optional in-process `LocalCache` first. Generations
+    are only kept there for `generation_ttl` seconds, which bounds how long
+    another worker may keep serving scores of a previous answer key.
+
+    `aget_many` and `aset_many` do the same round trips for async views
+    through the asyncio client returned by `async_client`.
+    """
+
+    encoding = struct.Struct("!d")
+
+    def __init__(
+        self,
+        client,
+        ttl: int,
+        local: Optional[LocalCache] = None,
+        generation_ttl: float = 0,
+        async_client: Callable = None,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.local = local
+        self.generation_ttl = generation_ttl
+        self.async_client = async_client
+
+    def _get_local(self, key: str):
+        if self.local is None:
+            return None
+        return self.local.get(key)
+
+    def _set_local(self, key: str, value, ttl: Optional[float] = None):
+        if self.local is not None:
+            self.local.set(key, value, ttl)
+
+    def encode(self, value: float) -> bytes:
+        return self.encoding.pack(value)
+
+    def decode(self, value: Optional[bytes]) -> Optional[float]:
+        if value is None:
+            return None
+        return self.encoding.unpack(value)[0]
+
+    def get_generation_key(self, quiz_id: UUID) -> str:
+        return f"quiz.{quiz_id}.generation"
+
+    def get_generation(self, quiz_id: UUID) -> int:
+        return self.get_generations([quiz_id])[quiz_id]
+
+    def get_generations(self, quiz_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        generations, misses = self._get_local_generations(quiz_ids)
+        if misses:
+            self._set_generations(
+                generations,
+                misses,
+                self.client.mget([self.get_generation_key(quiz_id) for quiz_id in misses]),
+            )
+        return generations
+
+    async def aget_generations(self, quiz_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        generations, misses = self._get_local_generations(quiz_ids)
+        if misses:
+            self._set_generations(
+                generations,
+                misses,
+                await self.async_client().mget(
+                    [self.get_generation_key(quiz_id) for quiz_id in misses]
+                ),
+            )
+        return generations
+
+    def _get_local_generations(self, quiz_ids: Iterable[UUID]):
+        generations = {}
+        for quiz_id in quiz_ids:
+            generations[quiz_id] = self._get_local(self.get_generation_key(quiz_id))
+
+        misses = [quiz_id for quiz_id, value in generations.items() if value is None]
+        return generations, misses
+
+    def _set_generations(self, generations, misses, values):
+        for quiz_id, value in zip(misses, values):
+            generations[quiz_id] = int(value or 0)
+            self._set_local(
+                self.get_generation_key(quiz_id),
+                generations[quiz_id],
+                self.generation_ttl,
+            )
+
+    def invalidate(self, quiz_id: UUID) -> int:
+        generation = self.client.incr(self.get_generation_key(quiz_id))
+        self._set_local(self.get_generation_key(quiz_id), generation, self.generation_ttl)
+        return generation
+
+    def get_hash_key(self, quiz_id: UUID, generation: Optional[int] = None) -> str:
+        if generation is None:
+            generation = self.get_generation(quiz_id)
+        return f"quiz.{quiz_id}.scores.{generation}"
+
+    def get_total_field(self, user_id: UUID) -> str:
+        return f"total.{user_id}"
+
+    def get_answer_field(self, question_id: UUID, user_id: UUID) -> str:
+        return f"answer.{question_id}.{user_id}"
+
+    def get(self, quiz_id: UUID, field: str) -> Optional[float]:
+        return self.get_many([(quiz_id, field)])[quiz_id, field]
+
+    def get_many(
+        self, fields: Iterable[Tuple[UUID, str]]
+    ) -> Dict[Tuple[UUID, str], Optional[float]]:
+        """
+        Read many `(quiz, field)` scores in at most one round trip, missing
+        scores map to None
+        """
+        values = dict.fromkeys(fields)
+        generations = self.get_generations({quiz_id for quiz_id, _ in values})
+        hash_keys, misses = self._get_local_many(values, generations)
+        if misses:
+            pipeline = self._get_many_pipeline(self.client, hash_keys, misses)
+            self._set_local_many(values, hash_keys, misses, pipeline.execute())
+
+        return values
+
+    async def aget_many(
+        self, fields: Iterable[Tuple[UUID, str]]
+    ) -> Dict[Tuple[UUID, str], Optional[float]]:
+        values = dict.fromkeys(fields)
+        generations = await self.aget_generations({quiz_id for quiz_id, _ in values})
+        hash_keys, misses = self._get_local_many(values, generations)
+        if misses:
+            pipeline = self._get_many_pipeline(self.async_client(), hash_keys, misses)
+            self._set_local_many(values, hash_keys, misses, await pipeline.execute())
+
+        return values
+
+    def _get_local_many(self, values, generations):
+        hash_keys = {
+            quiz_id: self.get_hash_key(quiz_id, generation)
+            for quiz_id, generation in generations.items()
+        }
+
+        misses = defaultdict(list)
+        for quiz_id, field in values:
+            value = self._get_local(f"{hash_keys[quiz_id]}:{field}")
+            if value is None:
+                misses[quiz_id].append(field)
+            values[quiz_id, field] = value
+
+        return hash_keys, misses
+
+    def _get_many_pipeline(self, client, hash_keys, misses):
+        pipeline = client.pipeline(transaction=False)
+        for quiz_id, quiz_fields in misses.items():
+            pipeline.hmget(hash_keys[quiz_id], quiz_fields)
+        return pipeline
+
+    def _set_local_many(self, values, hash_keys, misses, replies):
+        for (quiz_id, quiz_fields), quiz_replies in zip(misses.items(), replies):
+            for field, reply in zip(quiz_fields, quiz_replies):
+                values[quiz_id, field] = self.decode(reply)
+                self._set_local(f"{hash_keys[quiz_id]}:{field}", values[quiz_id, field])
+
+    def get_all(self, quiz_id: UUID) -> Dict[str, float]:
+        """
+        Every cached score of a quiz, keyed by field, with a single HGETALL
+        """
+        return {
+            field.decode(): self.decode(value)
+            for field, value in self.client.hgetall(self.get_hash_key(quiz_id)).items()
+        }
+
+    def set(self, quiz_id: UUID, field: str, value: float):
+        self.set_many({(quiz_id, field): value})
+
+    def set_many(self, mapping: Dict[Tuple[UUID, str], float]):
+        """
+        Write many `(quiz, field)` scores in a single round trip, refreshing
+        the TTL of every hash written to
+        """
+        if not mapping:
+            return
+
+        fields = self._group_by_quiz(mapping)
+        generations = self.get_generations(fields)
+        self._set_many_pipeline(self.client, fields, generations).execute()
+
+    async def aset_many(self, mapping: Dict[Tuple[UUID, str], float]):
+        if not mapping:
+            return
+
+        fields = self._group_by_quiz(mapping)
+        generations = await self.aget_generations(fields)
+        await self._set_many_pipeline(self.async_client(), fields, generations).execute()
+
+    def _group_by_quiz(self, mapping):
+        fields = defaultdict(dict)
+        for (quiz_id, field), value in mapping.items():
+            fields[quiz_id][field] = value
+        return fields
+
+    def _set_many_pipeline(self, client, fields, generations):
+        pipeline = client.pipeline(transaction=False)
+        for quiz_id, quiz_fields in fields.items():
+            hash_key = self.get_hash_key(quiz_id, generations[quiz_id])
+            for field, value in quiz_fields.items():
+                self._set_local(f"{hash_key}:{field}", value)
+            pipeline.hset(
+                hash_key,
+                mapping={field: self.encode(value) for field, value in quiz_fields.items()},
+            )
+            pipeline.expire(hash_key, self.ttl)
+        return pipeline
+
+    def delete(self, quiz_id: UUID):
+        self.client.delete(self.get_hash_key(quiz_id))
+
+
+class SnapshotCache:
+    """
+    Rendered quiz payloads cached as bytes along with their ETag.
+
+    Snapshots are kept in Redis and copied into a `LocalCache`, which is only
+    read when Redis cannot be reached. `aget` and `aset` do the same for async
+    views through the asyncio client returned by `async_client`.
+    """
+
+    def __init__(self, client, local: LocalCache, async_client: Callable = None):
+        self.client = client
+        self.local = local
+        self.async_client = async_client
+
+    def get_key(self, quiz_id: UUID) -> str:
+        return f"quiz.{quiz_id}.snapshot"
+
+    def get_etag(self, body: bytes) -> str:
+        return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def get(self, quiz_id: UUID) -> Optional[Tuple[bytes, str]]:
+        key = self.get_key(quiz_id)
+        try:
+            body, etag = self.client.hmget(key, ["body", "etag"])
+        except RedisError:
+            return self.local.get(key)
+
+        if body is None:
+            return None
+        return body, etag.decode()
+
+    async def aget(self, quiz_id: UUID) -> Optional[Tuple[bytes, str]]:
+        key = self.get_key(quiz_id)
+        try:
+            body, etag = await self.async_client().hmget(key, ["body", "etag"])
+        except RedisError:
+            return self.local.get(key)
+
+        if body is None:
+            return None
+        return body, etag.decode()
+
+    def set(self, quiz_id: UUID, body: bytes) -> Tuple[bytes, str]:
+        key = self.get_key(quiz_id)
+        snapshot = body, self.get_etag(body)
+        self.local.set(key, snapshot)
+        try:
+            self.client.hset(key, mapping={"body": body, "etag": snapshot[1]})
+        except RedisError:
+            pass
+
+        return snapshot
+
+    async def aset(self, quiz_id: UUID, body: bytes) -> Tuple[bytes, str]:
+        key = self.get_key(quiz_id)
+        snapshot = body, self.get_etag(body)
+        self.local.set(key, snapshot)
+        try:
+            await self.async_client().hset(
+                key, mapping={"body": body, "etag": snapshot[1]}
+            )
+        except RedisError:
+            pass
+
+        return snapshot
+
+    def delete(self, quiz_id: UUID):
+        key = self.get_key(quiz_id)
+        self.local.delete(key)
+        try:
+            self.client.delete(key)
+        except RedisError:
+            pass
+
+
+score_cache = ScoreCache(
+    RedisClient,
+    settings.SCORE_CACHE_TTL,
+    local=LocalCache(
+        settings.SCORE_LOCAL_CACHE_SIZE, settings.SCORE_LOCAL_CACHE_TTL
+    ),
+    generation_ttl=settings.SCORE_GENERATION_LOCAL_TTL,
+    async_client=get_async_redis_client,
+)
+
+snapshot_cache = SnapshotCache(
+    RedisClient,
+    LocalCache(settings.SNAPSHOT_LOCAL_CACHE_SIZE, settings.SCORE_LOCAL_CACHE_TTL),
+    async_client=get_async_redis_client,
+)
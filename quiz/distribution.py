@@ -0,0 +1,83 @@
+from typing import Dict, Iterable
+from uuid import UUID
+
+from quiz.scoring import ScoreSketch
+from quiz.utils import RedisClient
+
+
+class DistributionStore:
+    """
+    The `ScoreSketch` of every quiz, kept in one small Redis hash per quiz
+    holding a counter per histogram bucket along with the count, sum and sum
+    of squares of the scores. Scores are added with atomic increments.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_key(self, quiz_id: UUID) -> str:
+        return f"quiz.{quiz_id}.distribution"
+
+    def add(self, quiz_id: UUID, score: float):
+        key = self.get_key(quiz_id)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.hincrby(key, f"bucket.{ScoreSketch.get_bucket(score)}", 1)
+        pipeline.hincrby(key, "count", 1)
+        pipeline.hincrbyfloat(key, "total", score)
+        pipeline.hincrbyfloat(key, "square_total", score**2)
+        pipeline.execute()
+
+    def decode(self, fields: Dict[bytes, bytes]) -> ScoreSketch:
+        sketch = ScoreSketch()
+        for field, value in fields.items():
+            field = field.decode()
+            if field.startswith("bucket."):
+                sketch.counts[int(field[len("bucket.") :])] = int(value)
+        sketch.count = int(fields.get(b"count", 0))
+        sketch.total = float(fields.get(b"total", 0))
+        sketch.square_total = float(fields.get(b"square_total", 0))
+        return sketch
+
+    def get(self, quiz_id: UUID) -> ScoreSketch:
+        return self.decode(self.client.hgetall(self.get_key(quiz_id)))
+
+    def get_merged(self, quiz_ids: Iterable[UUID]) -> ScoreSketch:
+        """
+        One sketch for all the scores of many quizzes, read in a single round
+        trip
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        for quiz_id in quiz_ids:
+            pipeline.hgetall(self.get_key(quiz_id))
+
+        sketch = ScoreSketch()
+        for fields in pipeline.execute():
+            sketch = sketch.merge(self.decode(fields))
+        return sketch
+
+    def rebuild(self, quiz_id: UUID, scores: Iterable[float]):
+        sketch = ScoreSketch()
+        for score in scores:
+            sketch.add(score)
+
+        key = self.get_key(quiz_id)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(key)
+        if sketch.count:
+            pipeline.hset(
+                key,
+                mapping={
+                    **{
+                        f"bucket.{bucket}": count
+                        for bucket, count in enumerate(sketch.counts)
+                        if count
+                    },
+                    "count": sketch.count,
+                    "total": sketch.total,
+                    "square_total": sketch.square_total,
+                },
+            )
+        pipeline.execute()
+
+
+distributions = DistributionStore(RedisClient)
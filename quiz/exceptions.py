@@ -6,4 +6,5 @@ from rest_framework.exceptions import PermissionDenied
 MAX_QUESTIONS_LIMIT_REACHED = ValidationError(
     "Number of questions per quiz cannot be greater than 10"
 )
+MAX_ANSWERS_LIMIT_REACHED = ValidationError("Answers must not be more than 5")
 NOT_OWNER_OF_RESOURCE = PermissionDenied("You are not the owner of this quiz")
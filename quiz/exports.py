@@ -0,0 +1,280 @@
+import csv
+import json
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.core import serializers
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from redis.exceptions import RedisError
+
+from quiz.cache import score_cache, snapshot_cache
+from quiz.exceptions import MAX_ANSWERS_LIMIT_REACHED, MAX_QUESTIONS_LIMIT_REACHED
+from quiz.models import Answer, Question, Quiz, QuizTaken, UserAnswer, UserModel
+
+
+ScoreRow = Tuple[UUID, float, Dict[UUID, float]]
+
+
+class Echo:
+    """
+    A file-like object handing back whatever is written to it, for `csv.writer`
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_score_rows(
+    quiz_id: UUID, chunk_size: Optional[int] = None
+) -> Iterator[ScoreRow]:
+    """
+    Yield the total and per-question scores of every taker of a quiz, reading
+    takers through a server-side cursor and grading them a chunk at a time so
+    memory does not grow with the number of takers
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    user_ids = (
+        QuizTaken.objects.filter(quiz=quiz_id)
+        .order_by("created", "uuid")
+        .values_list("user", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(user_ids, chunk_size)):
+        score_table = QuizTaken.get_score_table(quiz_id, user_ids=chunk)
+        for user_id in chunk:
+            yield (
+                user_id,
+                score_table.totals.get(user_id),
+                {
+                    row["question"]: row["score"]
+                    for row in score_table.answers.get(user_id, [])
+                },
+            )
+
+
+def get_question_ids(quiz_id: UUID) -> List[UUID]:
+    return list(
+        Question.objects.filter(quiz=quiz_id)
+        .order_by("-created")
+        .values_list("uuid", flat=True)
+    )
+
+
+def render_csv(quiz_id: UUID) -> Iterator[str]:
+    question_ids = get_question_ids(quiz_id)
+    writer = csv.writer(Echo())
+    yield writer.writerow(["user", "score", *question_ids])
+    for user_id, total, scores in iter_score_rows(quiz_id):
+        yield writer.writerow(
+            [user_id, total, *(scores.get(question_id, "") for question_id in question_ids)]
+        )
+
+
+def render_ndjson(quiz_id: UUID) -> Iterator[str]:
+    for user_id, total, scores in iter_score_rows(quiz_id):
+        yield json.dumps(
+            {
+                "user": user_id,
+                "score": total,
+                "questions": [
+                    {"question": question_id, "score": score}
+                    for question_id, score in scores.items()
+                ],
+            },
+            cls=DjangoJSONEncoder,
+        ) + "\n"
+
+
+# Quiz banks are moved as Django's JSON Lines serialization, the format of the
+# test fixtures, one row per line with every parent ahead of its children
+BANK_MODELS = (Quiz, Question, Answer)
+SUBMISSION_MODELS = (QuizTaken, UserAnswer)
+
+
+class BankImportError(Exception):
+    pass
+
+
+def iter_quiz_bank(
+    quizzes: models.QuerySet,
+    submissions: bool = False,
+    chunk_size: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Yield the quizzes with their questions and answers, and optionally who took
+    them and how they answered, reading a chunk of quizzes at a time and their
+    rows through server-side cursors so memory does not grow with the bank
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    quiz_ids = (
+        quizzes.order_by("created", "uuid")
+        .values_list("uuid", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(quiz_ids, chunk_size)):
+        querysets = [
+            Quiz.objects.filter(pk__in=chunk),
+            Question.objects.filter(quiz__in=chunk),
+            Answer.objects.filter(quiz__in=chunk),
+        ]
+        if submissions:
+            querysets += [
+                QuizTaken.objects.filter(quiz__in=chunk),
+                UserAnswer.objects.filter(question__quiz__in=chunk).prefetch_related(
+                    "answer"
+                ),
+            ]
+
+        for queryset in querysets:
+            rows = queryset.order_by("created", "uuid").iterator(chunk_size=chunk_size)
+            while rows_chunk := list(islice(rows, chunk_size)):
+                yield serializers.serialize("jsonl", rows_chunk)
+
+
+def insert_rows(model, rows: List[models.Model], owner: Optional[UserModel]):
+    # The copied quiz and owner are taken from the rows already in the database
+    if model is Question:
+        quizzes = Quiz.objects.filter(pk__in={row.quiz_id for row in rows})
+        if owner is not None:
+            quizzes = quizzes.filter(owner=owner)
+        owners = dict(quizzes.values_list("pk", "owner"))
+        for row in rows:
+            if row.quiz_id not in owners:
+                raise BankImportError(f"Question {row.pk} belongs to an unknown quiz")
+            row.owner_id = owners[row.quiz_id]
+    elif model is Answer:
+        questions = Question.objects.filter(pk__in={row.question_id for row in rows})
+        if owner is not None:
+            questions = questions.filter(owner=owner)
+        parents = {
+            pk: (quiz_id, owner_id)
+            for pk, quiz_id, owner_id in questions.values_list("pk", "quiz", "owner")
+        }
+        for row in rows:
+            if row.question_id not in parents:
+                raise BankImportError(f"Answer {row.pk} belongs to an unknown question")
+            row.quiz_id, row.owner_id = parents[row.question_id]
+
+    model.objects.bulk_create(rows, ignore_conflicts=True)
+
+    if model is UserAnswer:
+        Through = UserAnswer.answer.through
+        Through.objects.bulk_create(
+            [
+                Through(useranswer_id=row.pk, answer_id=answer_id)
+                for row in rows
+                for answer_id in row.answer_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def check_limits(quiz_ids: List[UUID]):
+    if Quiz.objects.filter(
+        pk__in=quiz_ids, question_count__gt=settings.MAX_QUESTION_PER_QUIZ
+    ).exists():
+        raise BankImportError(MAX_QUESTIONS_LIMIT_REACHED.messages[0])
+    if Question.objects.filter(
+        quiz__in=quiz_ids, answer_count__gt=settings.MAX_ANSWER_PER_QUESTION
+    ).exists():
+        raise BankImportError(MAX_ANSWERS_LIMIT_REACHED.messages[0])
+
+
+@transaction.atomic
+def import_quiz_bank(
+    lines: Iterable,
+    owner: Optional[UserModel] = None,
+    batch_size: Optional[int] = None,
+) -> Counter:
+    """
+    Insert the rows of `iter_quiz_bank` in batches, keeping their UUIDs and
+    skipping rows that already exist. Given an `owner`, the quizzes are handed
+    to them, rows may only be added to quizzes they own, submissions are
+    refused and the limits on questions and answers are enforced.
+    """
+    batch_size = batch_size or settings.EXPORT_CHUNK_SIZE
+    allowed = BANK_MODELS if owner is not None else BANK_MODELS + SUBMISSION_MODELS
+    batches = {model: [] for model in allowed}
+    quiz_ids, new_question_ids = set(), set()
+    keyed_quiz_ids, keyed_question_ids = set(), set()
+    counts = Counter()
+
+    def flush():
+        # Parents first, as the ownership checks read them back
+        for model, rows in batches.items():
+            if not rows:
+                continue
+
+            if model is Question:
+                existing = set(
+                    Question.objects.filter(pk__in=[row.pk for row in rows])
+                    .values_list("pk", flat=True)
+                )
+                new_question_ids.update(row.pk for row in rows if row.pk not in existing)
+            insert_rows(model, rows, owner)
+            if model is Answer:
+                # The quiz of an answer is only known once `insert_rows`
+                # resolved it through the question. Questions created by this
+                # import have no scores graded against another answer key.
+                for row in rows:
+                    quiz_ids.add(row.quiz_id)
+                    if row.question_id not in new_question_ids:
+                        keyed_quiz_ids.add(row.quiz_id)
+                        keyed_question_ids.add(row.question_id)
+            counts[model._meta.model_name] += len(rows)
+            rows.clear()
+
+    try:
+        for deserialized in serializers.deserialize("jsonl", lines):
+            row = deserialized.object
+            if type(row) not in batches:
+                raise BankImportError(f"{row._meta.label} rows cannot be imported")
+
+            if isinstance(row, Quiz):
+                if owner is not None:
+                    row.owner = owner
+                quiz_ids.add(row.pk)
+            elif isinstance(row, Question):
+                quiz_ids.add(row.quiz_id)
+            elif isinstance(row, UserAnswer):
+                row.answer_ids = deserialized.m2m_data.get("answer", [])
+
+            batches[type(row)].append(row)
+            if len(batches[type(row)]) >= batch_size:
+                flush()
+        flush()
+    except DeserializationError as error:
+        raise BankImportError(str(error)) from error
+
+    quiz_ids = list(quiz_ids)
+    for start in range(0, len(quiz_ids), batch_size):
+        chunk = quiz_ids[start : start + batch_size]
+        Quiz.recount(chunk)
+        if owner is not None:
+            check_limits(chunk)
+
+    # Stored scores were graded against the previous answer keys
+    keyed_question_ids = list(keyed_question_ids)
+    for start in range(0, len(keyed_question_ids), batch_size):
+        chunk = keyed_question_ids[start : start + batch_size]
+        UserAnswer.objects.filter(question__in=chunk).update(score=None)
+    keyed_quiz_ids = list(keyed_quiz_ids)
+    for start in range(0, len(keyed_quiz_ids), batch_size):
+        chunk = keyed_quiz_ids[start : start + batch_size]
+        QuizTaken.objects.filter(quiz__in=chunk).update(score=None)
+
+    def invalidate():
+        for quiz_id in quiz_ids:
+            try:
+                score_cache.invalidate(quiz_id)
+            except RedisError:
+                pass
+            snapshot_cache.delete(quiz_id)
+
+    transaction.on_commit(invalidate)
+    return counts
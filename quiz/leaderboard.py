@@ -0,0 +1,112 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from quiz.utils import RedisClient
+
+
+class Leaderboard:
+    """
+    Quiz results ranked in Redis sorted sets, one per public quiz holding the
+    score of every user that took it and a global one holding the sum of the
+    scores of every user across public quizzes. Every read is O(log n).
+    """
+
+    chunk_size = 1000
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_key(self, quiz_id: Optional[UUID] = None) -> str:
+        if quiz_id is None:
+            return "quiz.leaderboard"
+        return f"quiz.{quiz_id}.leaderboard"
+
+    def get_entries(
+        self, rows: Iterable[Tuple[bytes, float]], first_rank: int
+    ) -> List[dict]:
+        return [
+            {"rank": rank, "user": user.decode(), "score": score}
+            for rank, (user, score) in enumerate(rows, start=first_rank)
+        ]
+
+    def add(self, quiz_id: UUID, user_id: UUID, score: float):
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zadd(self.get_key(quiz_id), {str(user_id): score})
+        pipeline.zincrby(self.get_key(), score, str(user_id))
+        pipeline.execute()
+
+    def remove(self, quiz_id: UUID):
+        """
+        Drop the board of a quiz along with its share of the global board
+        """
+        key = self.get_key(quiz_id)
+        rows = self.client.zrange(key, 0, -1, withscores=True)
+        pipeline = self.client.pipeline(transaction=True)
+        for user, score in rows:
+            pipeline.zincrby(self.get_key(), -score, user)
+        pipeline.delete(key)
+        pipeline.execute()
+
+    def top(self, quiz_id: Optional[UUID], count: int) -> List[dict]:
+        rows = self.client.zrevrange(self.get_key(quiz_id), 0, count - 1, withscores=True)
+        return self.get_entries(rows, 1)
+
+    def around(
+        self, quiz_id: Optional[UUID], user_id: UUID, radius: int
+    ) -> Optional[List[dict]]:
+        """
+        The entries ranked up to `radius` places above and below a user, None
+        when the user is not ranked
+        """
+        rank = self.client.zrevrank(self.get_key(quiz_id), str(user_id))
+        if rank is None:
+            return None
+
+        start = max(rank - radius, 0)
+        rows = self.client.zrevrange(
+            self.get_key(quiz_id), start, rank + radius, withscores=True
+        )
+        return self.get_entries(rows, start + 1)
+
+    def percentile(self, quiz_id: Optional[UUID], user_id: UUID) -> Optional[dict]:
+        """
+        The rank of a user and the percentage of users scoring below them,
+        None when the user is not ranked
+        """
+        key = self.get_key(quiz_id)
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zscore(key, str(user_id))
+        pipeline.zrevrank(key, str(user_id))
+        pipeline.zcard(key)
+        score, rank, total = pipeline.execute()
+        if score is None:
+            return None
+
+        below = self.client.zcount(key, "-inf", f"({score}")
+        return {
+            "rank": rank + 1,
+            "user": str(user_id),
+            "score": score,
+            "total": total,
+            "percentile": 100 * below / total,
+        }
+
+    def rebuild(self, quiz_id: Optional[UUID], scores: Dict[UUID, float]):
+        """
+        Replace a leaderboard at once with `scores`, keyed by user
+        """
+        key = self.get_key(quiz_id)
+        if not scores:
+            self.client.delete(key)
+            return
+
+        building_key = f"{key}.{uuid4()}"
+        items = [(str(user_id), score) for user_id, score in scores.items()]
+        pipeline = self.client.pipeline(transaction=False)
+        for start in range(0, len(items), self.chunk_size):
+            pipeline.zadd(building_key, dict(items[start : start + self.chunk_size]))
+        pipeline.rename(building_key, key)
+        pipeline.execute()
+
+
+leaderboard = Leaderboard(RedisClient)
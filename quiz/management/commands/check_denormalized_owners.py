@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+
+from quiz.models import Answer, Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the quiz and owner copied onto questions and answers match "
+        "the quiz they belong to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Copy the quiz and owner again where they do not match",
+        )
+
+    def handle(self, *args, **options):
+        questions = Question.objects.exclude(owner=F("quiz__owner"))
+        answers = Answer.objects.filter(
+            ~Q(quiz=F("question__quiz")) | ~Q(owner=F("question__quiz__owner"))
+        )
+        question_count, answer_count = questions.count(), answers.count()
+        if not question_count and not answer_count:
+            self.stdout.write("Questions and answers are consistent")
+            return
+
+        message = (
+            f"{question_count} questions and {answer_count} answers do not match "
+            "their quiz"
+        )
+        if not options["fix"]:
+            raise CommandError(message)
+
+        for question in questions.select_related("quiz"):
+            Question.objects.filter(pk=question.pk).update(owner=question.quiz.owner_id)
+        for answer in answers.select_related("question__quiz"):
+            Answer.objects.filter(pk=answer.pk).update(
+                quiz=answer.question.quiz_id, owner=answer.question.quiz.owner_id
+            )
+        self.stdout.write(f"Fixed {message}")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.exports import iter_quiz_bank
+from quiz.models import Quiz, UserModel
+
+
+class Command(BaseCommand):
+    help = "Stream quizzes with their questions and answers as JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quiz", action="append", default=[], help="Only export this quiz"
+        )
+        parser.add_argument("--owner", help="Only export quizzes of this email")
+        parser.add_argument(
+            "--submissions",
+            action="store_true",
+            help="Also export who took the quizzes and how they answered",
+        )
+        parser.add_argument("--output", help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options["quiz"]:
+            quizzes = quizzes.filter(pk__in=options["quiz"])
+        if options["owner"]:
+            try:
+                quizzes = quizzes.filter(
+                    owner=UserModel.objects.get(email=options["owner"])
+                )
+            except UserModel.DoesNotExist:
+                raise CommandError(f"No user with email {options['owner']}")
+
+        lines = iter_quiz_bank(quizzes, submissions=options["submissions"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w") as output:
+            output.writelines(lines)
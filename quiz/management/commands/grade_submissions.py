@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from quiz import submissions
+from quiz.models import Submission
+
+
+class Command(BaseCommand):
+    help = "Grade quiz submissions queued by TakeQuizAPI"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=5,
+            help="Seconds to wait for a submission when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for more",
+        )
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help="Queue every pending submission again before starting, "
+            "e.g. after a worker or Redis was lost",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue"]:
+            submissions.enqueue(
+                *Submission.objects.filter(status=Submission.PENDING)
+                .order_by("created")
+                .values_list("uuid", flat=True)
+            )
+
+        timeout = 0 if options["once"] else options["timeout"]
+        while True:
+            submission_ids = submissions.dequeue(options["batch_size"], timeout)
+            if submission_ids:
+                count = submissions.grade_batch(submission_ids)
+                self.stdout.write(f"Graded {count} submissions")
+            elif options["once"]:
+                break
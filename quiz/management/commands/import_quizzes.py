@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.exports import BankImportError, import_quiz_bank
+from quiz.models import UserModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Import quizzes written by export_quizzes, keeping their UUIDs and "
+        "skipping the ones already present"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help='File to read, or "-" for stdin')
+        parser.add_argument(
+            "--owner",
+            help=(
+                "Hand the quizzes to the user with this email. Submissions are "
+                "then refused."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, help="Rows per INSERT")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["owner"]:
+            try:
+                owner = UserModel.objects.get(email=options["owner"])
+            except UserModel.DoesNotExist:
+                raise CommandError(f"No user with email {options['owner']}")
+
+        try:
+            if options["input"] == "-":
+                counts = import_quiz_bank(
+                    sys.stdin, owner=owner, batch_size=options["batch_size"]
+                )
+            else:
+                with open(options["input"]) as lines:
+                    counts = import_quiz_bank(
+                        lines, owner=owner, batch_size=options["batch_size"]
+                    )
+        except BankImportError as error:
+            raise CommandError(error)
+
+        summary = ", ".join(f"{count} {name} rows" for name, count in counts.items())
+        self.stdout.write(
+            f"Imported {summary or 'nothing'}, skipping rows already present"
+        )
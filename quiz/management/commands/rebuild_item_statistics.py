@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quiz.models import QuestionStatistics, Quiz
+
+
+class Command(BaseCommand):
+    help = "Recompute the item statistics of every quiz from its submissions"
+
+    def handle(self, *args, **options):
+        count = 0
+        for quiz_id in Quiz.objects.values_list("uuid", flat=True).iterator():
+            with transaction.atomic():
+                QuestionStatistics.rebuild(quiz_id)
+            count += 1
+
+        self.stdout.write(f"Rebuilt the item statistics of {count} quizzes")
@@ -0,0 +1,24 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from quiz.leaderboard import leaderboard
+from quiz.models import Quiz, QuizTaken
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis leaderboards of public quizzes from the database"
+
+    def handle(self, *args, **options):
+        totals = defaultdict(float)
+        count = 0
+        quiz_ids = Quiz.objects.filter(public=True).values_list("uuid", flat=True)
+        for quiz_id in quiz_ids.iterator():
+            count += 1
+            scores = QuizTaken.get_score_table(quiz_id).totals
+            leaderboard.rebuild(quiz_id, scores)
+            for user_id, score in scores.items():
+                totals[user_id] += score
+
+        leaderboard.rebuild(None, totals)
+        self.stdout.write(f"Rebuilt the leaderboards of {count} quizzes")
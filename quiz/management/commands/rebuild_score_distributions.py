@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from quiz.distribution import distributions
+from quiz.models import Quiz, QuizTaken
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis score distributions of every quiz from the database"
+
+    def handle(self, *args, **options):
+        count = 0
+        for quiz_id in Quiz.objects.values_list("uuid", flat=True).iterator():
+            count += 1
+            distributions.rebuild(
+                quiz_id, QuizTaken.get_score_table(quiz_id).totals.values()
+            )
+
+        self.stdout.write(f"Rebuilt the score distributions of {count} quizzes")
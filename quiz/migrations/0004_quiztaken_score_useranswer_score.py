@@ -0,0 +1,23 @@
+# Generated by Django 4.1 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_alter_useranswer_options_useranswer_question_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiztaken',
+            name='score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1 on 2026-10-18 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_submission'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['public', '-created', '-uuid'], name='quiz_public_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='quiztaken',
+            index=models.Index(fields=['quiz', '-created', '-uuid'], name='quiztaken_quiz_keyset'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+SEARCHED_COLUMNS = (
+    ("quiz_quiz", "title"),
+    ("quiz_question", "text"),
+    ("quiz_answer", "text"),
+)
+
+
+def add_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, column in SEARCHED_COLUMNS:
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('english', coalesce({column}, ''))) "
+            "STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {table}_search_vector ON {table} USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {table}_{column}_trigram ON {table} "
+            f"USING GIN ({column} gin_trgm_ops)"
+        )
+
+
+def remove_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, column in SEARCHED_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{column}_trigram")
+        schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0006_quiz_quiz_public_keyset_and_more"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_search_vectors, remove_search_vectors),
+    ]
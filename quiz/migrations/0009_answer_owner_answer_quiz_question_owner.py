@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def copy_owners(apps, schema_editor):
+    Quiz = apps.get_model("quiz", "Quiz")
+    Question = apps.get_model("quiz", "Question")
+    Answer = apps.get_model("quiz", "Answer")
+
+    Question.objects.update(
+        owner=Subquery(Quiz.objects.filter(pk=OuterRef("quiz")).values("owner")[:1])
+    )
+    questions = Question.objects.filter(pk=OuterRef("question"))
+    Answer.objects.update(
+        quiz=Subquery(questions.values("quiz")[:1]),
+        owner=Subquery(questions.values("owner")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("quiz", "0008_questionstatistics_answerstatistics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="owner",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="answer",
+            name="quiz",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="quiz.quiz",
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="owner",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_owners, migrations.RunPython.noop),
+    ]
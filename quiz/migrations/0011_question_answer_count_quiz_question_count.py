@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(apps, schema_editor):
+    Quiz = apps.get_model("quiz", "Quiz")
+    Question = apps.get_model("quiz", "Question")
+    Answer = apps.get_model("quiz", "Answer")
+
+    questions = (
+        Question.objects.filter(quiz=OuterRef("pk"))
+        .order_by()
+        .values("quiz")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Quiz.objects.update(question_count=Coalesce(Subquery(questions), 0))
+    answers = (
+        Answer.objects.filter(question=OuterRef("pk"))
+        .order_by()
+        .values("question")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Question.objects.update(answer_count=Coalesce(Subquery(answers), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0010_alter_answer_owner_alter_answer_quiz_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="answer_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="quiz",
+            name="question_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+    ]
@@ -1,36 +1,297 @@
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Q
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.expressions import RawSQL
 
 from backend.models import TimeStampedModel
-from quiz.utils import RedisClient
+from quiz.cache import score_cache
+from quiz.scoring import (
+    AnswerKey,
+    ScoreTable,
+    grade_quiz,
+    is_fully_correct,
+    score_selection,
+)
 
 
 UserModel = get_user_model()
 
 
-class Quiz(TimeStampedModel):
+# Quizzes matching a tsquery on their title, questions or answers, each
+# branch answered from the GIN index over the `search_vector` columns
+SEARCH_MATCHES_SQL = """
+    SELECT quiz.uuid FROM quiz_quiz quiz
+    WHERE quiz.search_vector @@ to_tsquery('english', %s)
+    UNION
+    SELECT question.quiz_id FROM quiz_question question
+    WHERE question.search_vector @@ to_tsquery('english', %s)
+    UNION
+    SELECT question.quiz_id FROM quiz_answer answer
+    JOIN quiz_question question ON question.uuid = answer.question_id
+    WHERE answer.search_vector @@ to_tsquery('english', %s)
+"""
+
+SEARCH_RANK_SQL = """
+    SELECT max(rank) FROM (
+        SELECT ts_rank(quiz_quiz.search_vector, to_tsquery('english', %s)) AS rank
+        UNION ALL
+        SELECT ts_rank(question.search_vector, to_tsquery('english', %s))
+        FROM quiz_question question
+        WHERE question.quiz_id = quiz_quiz.uuid
+        AND question.search_vector @@ to_tsquery('english', %s)
+        UNION ALL
+        SELECT ts_rank(answer.search_vector, to_tsquery('english', %s))
+        FROM quiz_answer answer
+        JOIN quiz_question question ON question.uuid = answer.question_id
+        WHERE question.quiz_id = quiz_quiz.uuid
+        AND answer.search_vector @@ to_tsquery('english', %s)
+    ) ranks
+"""
+
+# Quizzes with a title, question or answer containing a word close to the
+# search text, answered from the trigram indexes
+SIMILAR_MATCHES_SQL = """
+    SELECT quiz.uuid FROM quiz_quiz quiz WHERE %s <%% quiz.title
+    UNION
+    SELECT question.quiz_id FROM quiz_question question WHERE %s <%% question.text
+    UNION
+    SELECT question.quiz_id FROM quiz_answer answer
+    JOIN quiz_question question ON question.uuid = answer.question_id
+    WHERE %s <%% answer.text
+"""
+
+SIMILAR_RANK_SQL = """
+    SELECT max(rank) FROM (
+        SELECT word_similarity(%s, quiz_quiz.title) AS rank
+        UNION ALL
+        SELECT word_similarity(%s, question.text)
+        FROM quiz_question question WHERE question.quiz_id = quiz_quiz.uuid
+        UNION ALL
+        SELECT word_similarity(%s, answer.text)
+        FROM quiz_answer answer
+        JOIN quiz_question question ON question.uuid = answer.question_id
+        WHERE question.quiz_id = quiz_quiz.uuid
+    ) ranks
+"""
+
+
+class LoadedValuesMixin:
+    """
+    Keeps the values a row was loaded with, for `quiz.signals` to tell moves
+    and ownership transfers apart
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class CounterFieldsMixin:
+    """
+    Leaves the `counter_fields` out of saves of existing rows. They are only
+    written by single UPDATE statements, so the loaded values may be stale.
+    """
+
+    counter_fields: Tuple[str, ...] = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class ReservingSaveMixin:
+    """
+    Runs saves in a transaction, so the slot reserved for the row by its
+    `pre_save` signal is given back when the INSERT or UPDATE fails
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+def reserve(queryset: models.QuerySet, field: str, limit: int) -> bool:
+    """
+    Count one more row against `field` unless it has reached `limit`, checking
+    and incrementing in the same UPDATE so the limit holds under concurrency
+    """
+    return bool(
+        queryset.filter(**{f"{field}__lt": limit}).update(**{field: F(field) + 1})
+    )
+
+
+def release(queryset: models.QuerySet, field: str):
+    queryset.filter(**{f"{field}__gt": 0}).update(**{field: F(field) - 1})
+
+
+class QuizQuerySet(models.QuerySet):
+    def search(self, text: str) -> "QuizQuerySet":
+        """
+        Quizzes whose title, questions or answers match every word of `text`,
+        the last ones as prefixes, best ranked first. Falls back to trigram
+        similarity when nothing matches, to forgive typos. Databases other
+        than Postgres get a plain substring search.
+        """
+        words = re.findall(r"\w+", text)
+        if not words:
+            return self.none()
+
+        if connections[self.db].vendor != "postgresql":
+            return self.filter(
+                Q(title__icontains=text)
+                | Q(question__text__icontains=text)
+                | Q(question__answer__text__icontains=text)
+            ).distinct()
+
+        query = " & ".join(f"{word}:*" for word in words)
+        matches = self.filter(
+            uuid__in=RawSQL(SEARCH_MATCHES_SQL, [query] * 3)
+        ).annotate(rank=RawSQL(SEARCH_RANK_SQL, [query] * 5))
+        if not matches.exists():
+            text = " ".join(words)
+            matches = self.filter(
+                uuid__in=RawSQL(SIMILAR_MATCHES_SQL, [text] * 3)
+            ).annotate(rank=RawSQL(SIMILAR_RANK_SQL, [text] * 3))
+
+        return matches.order_by("-rank", "-created")
+
+
+class Quiz(CounterFieldsMixin, LoadedValuesMixin, TimeStampedModel):
     owner = models.ForeignKey(UserModel, on_delete=models.CASCADE)
     title = models.CharField(max_length=128)
     public = models.BooleanField(default=False)
+    # Maintained by `quiz.signals` as questions are created, moved and deleted
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = QuizQuerySet.as_manager()
+    counter_fields = ("question_count",)
+
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            models.Index(
+                fields=["public", "-created", "-uuid"], name="quiz_public_keyset"
+            )
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    @staticmethod
+    def reserve_question(quiz_id: UUID) -> bool:
+        return reserve(
+            Quiz.objects.filter(pk=quiz_id),
+            "question_count",
+            settings.MAX_QUESTION_PER_QUIZ,
+        )
+
+    @staticmethod
+    def release_question(quiz_id: UUID):
+        release(Quiz.objects.filter(pk=quiz_id), "question_count")
 
-class Question(TimeStampedModel):
+    @staticmethod
+    def recount(quiz_ids: Iterable[UUID]):
+        """
+        Count the questions of these quizzes and the answers of their questions
+        again, for rows written without going through the signals
+        """
+        questions = (
+            Question.objects.filter(quiz=OuterRef("pk"))
+            .order_by()
+            .values("quiz")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        Quiz.objects.filter(pk__in=quiz_ids).update(
+            question_count=Coalesce(Subquery(questions), 0)
+        )
+        answers = (
+            Answer.objects.filter(question=OuterRef("pk"))
+            .order_by()
+            .values("question")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        Question.objects.filter(quiz__in=quiz_ids).update(
+            answer_count=Coalesce(Subquery(answers), 0)
+        )
+
+
+class Question(
+    ReservingSaveMixin, CounterFieldsMixin, LoadedValuesMixin, TimeStampedModel
+):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
     text = models.CharField(max_length=200)
+    # Copied from the quiz by `quiz.signals` so ownership is a single column
+    owner = models.ForeignKey(UserModel, on_delete=models.CASCADE, editable=False)
+    # Maintained by `quiz.signals` as answers are created, moved and deleted
+    answer_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ("answer_count",)
 
     def __str__(self) -> str:
         return self.text
 
+    @staticmethod
+    def reserve_answer(question_id: UUID) -> bool:
+        return reserve(
+            Question.objects.filter(pk=question_id),
+            "answer_count",
+            settings.MAX_ANSWER_PER_QUESTION,
+        )
+
+    @staticmethod
+    def release_answer(question_id: UUID):
+        release(Question.objects.filter(pk=question_id), "answer_count")
+
+    def get_answer_key(self) -> AnswerKey:
+        return AnswerKey.from_rows(self.answer_set.values_list("uuid", "is_answer"))
+
+    @staticmethod
+    def get_answer_keys(question_ids: Iterable[UUID]) -> Dict[UUID, AnswerKey]:
+        return Answer.objects.filter(question__in=set(question_ids)).answer_keys()
+
+
+class AnswerQuerySet(models.QuerySet):
+    def answer_keys(self) -> Dict[UUID, AnswerKey]:
+        """
+        Load the answer keys of the questions of these answers with a single query
+        """
+        rows = defaultdict(list)
+        for question_id, uuid, is_answer in self.values_list(
+            "question", "uuid", "is_answer"
+        ):
+            rows[question_id].append((uuid, is_answer))
+
+        return {
+            question_id: AnswerKey.from_rows(answers)
+            for question_id, answers in rows.items()
+        }
 
-class Answer(TimeStampedModel):
+
+class Answer(ReservingSaveMixin, LoadedValuesMixin, TimeStampedModel):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     text = models.CharField(max_length=128)
     is_answer = models.BooleanField(default=False)
+    # Copied from the question by `quiz.signals` so ownership is a single column
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, editable=False)
+    owner = models.ForeignKey(UserModel, on_delete=models.CASCADE, editable=False)
+
+    objects = AnswerQuerySet.as_manager()
 
     def __str__(self) -> str:
         return self.text
@@ -39,6 +300,7 @@ class Answer(TimeStampedModel):
 class QuizTaken(TimeStampedModel):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
     user = models.ForeignKey(UserModel, on_delete=models.CASCADE)
+    score = models.FloatField(null=True, blank=True)
 
     class Meta:
         constraints = [
@@ -46,39 +308,150 @@ class QuizTaken(TimeStampedModel):
                 fields=["quiz", "user"], name="unique_quizzes_for_users"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["quiz", "-created", "-uuid"], name="quiztaken_quiz_keyset"
+            )
+        ]
 
     def __str__(self) -> str:
         return str(self.quiz)
     
-    def get_redis_key(self):
-        return f"quiz.{self.quiz.uuid}.{self.user.uuid}"
+    def get_cache_field(self) -> Tuple[UUID, str]:
+        return self.quiz_id, score_cache.get_total_field(self.user_id)
     
-    def get_user_answers(self):
-        question_set = self.quiz.question_set.all()
-        results = []
-        for question in question_set:
-            try:
-                results.append(UserAnswer.objects.get(
-                    user=self.user,
-                    question=question
-                ))
-            except UserAnswer.DoesNotExist:
-                pass
-
-        return results
+    @staticmethod
+    def get_score_table(quiz_id: UUID, user_ids: Iterable[UUID] = None) -> ScoreTable:
+        """
+        Grade every user that took a quiz, or only `user_ids`, with one query
+        for the picked answers. Scores stored at submission time are used as
+        is; the answer keys are only loaded when some are missing.
+        """
+        user_answers = UserAnswer.objects.filter(question__quiz=quiz_id)
+        if user_ids is not None:
+            user_answers = user_answers.filter(user__in=list(user_ids))
+
+        selections = list(
+            user_answers.order_by("-question__created").values_list(
+                "user", "question", "answer", "score"
+            )
+        )
+        answer_keys = {}
+        if any(score is None for *_, score in selections):
+            answer_keys = Answer.objects.filter(quiz=quiz_id).answer_keys()
+
+        return grade_quiz(answer_keys, selections)
+
+    @staticmethod
+    def prefetch_scores(quiz_takens: Iterable["QuizTaken"]):
+        """
+        Load the user answers and scores of many results at once. Scores that
+        are not stored are read from the cache in a single round trip, the
+        misses are graded together and written back in a single pipeline.
+        """
+        keys = QuizTaken._load_user_answers(quiz_takens)
+        if keys:
+            cached = score_cache.get_many(keys.values())
+            score_cache.set_many(QuizTaken._grade_misses(keys, cached))
+
+    @staticmethod
+    async def aprefetch_scores(quiz_takens: Iterable["QuizTaken"]):
+        """
+        `prefetch_scores` for async views, reaching the cache through the
+        asyncio client
+        """
+        keys = await sync_to_async(QuizTaken._load_user_answers)(quiz_takens)
+        if keys:
+            cached = await score_cache.aget_many(keys.values())
+            await score_cache.aset_many(
+                await sync_to_async(QuizTaken._grade_misses)(keys, cached)
+            )
+
+    @staticmethod
+    def _load_user_answers(quiz_takens: Iterable["QuizTaken"]) -> dict:
+        """
+        Attach their user answers to the results, and return the cache field
+        of every score that is not stored
+        """
+        quiz_takens = list(quiz_takens)
+        if not quiz_takens:
+            return {}
+
+        user_answers = defaultdict(list)
+        for user_answer in (
+            UserAnswer.objects.filter(
+                question__quiz__in={taken.quiz_id for taken in quiz_takens},
+                user__in={taken.user_id for taken in quiz_takens},
+            )
+            .select_related("question")
+            .prefetch_related("answer")
+            .order_by("-question__created")
+        ):
+            user_answers[user_answer.question.quiz_id, user_answer.user_id].append(
+                user_answer
+            )
+
+        keys = {}
+        for taken in quiz_takens:
+            taken._user_answers = user_answers[taken.quiz_id, taken.user_id]
+            if taken.score is None and taken._user_answers:
+                keys[taken] = taken.get_cache_field()
+            for user_answer in taken._user_answers:
+                if user_answer.score is None:
+                    keys[user_answer] = user_answer.get_cache_field()
+        return keys
+
+    @staticmethod
+    def _grade_misses(keys: dict, cached: dict) -> dict:
+        """
+        Grade the scores missing from the cache, returning them by cache field
+        """
+        for instance, key in keys.items():
+            instance._cached_score = cached[key]
+
+        misses = [
+            user_answer
+            for user_answer in keys
+            if isinstance(user_answer, UserAnswer) and user_answer._cached_score is None
+        ]
+        scores = UserAnswer.get_scores(misses)
+        for user_answer in misses:
+            user_answer._cached_score = scores[user_answer.pk]
+
+        for taken in keys:
+            if isinstance(taken, QuizTaken) and taken._cached_score is None:
+                misses.append(taken)
+                taken._cached_score = sum(
+                    user_answer.get_score() for user_answer in taken._user_answers
+                ) / len(taken._user_answers)
+
+        return {keys[instance]: instance._cached_score for instance in misses}
+
+    def get_user_answers(self) -> List["UserAnswer"]:
+        if hasattr(self, "_user_answers"):
+            return self._user_answers
+
+        return list(
+            UserAnswer.objects.filter(user=self.user_id, question__quiz=self.quiz_id)
+            .select_related("question")
+            .prefetch_related("answer")
+            .order_by("-question__created")
+        )
 
     def get_quiz_score(self):
-        if res := RedisClient.get(self.get_redis_key()):
+        if self.score is not None:
+            return self.score
+
+        if getattr(self, "_cached_score", None) is not None:
+            return self._cached_score
+
+        field = self.get_cache_field()
+        if (res := score_cache.get(*field)) is not None:
             return res
 
-        total_count = 0
-        count = 0
-        for question in self.get_user_answers():
-            count += 1
-            user_answer_score = question.get_score()
-            total_count += user_answer_score
-        result = total_count / count
-        RedisClient.set(self.get_redis_key(), result)
+        scores = UserAnswer.get_scores(self.get_user_answers())
+        result = sum(scores.values()) / len(scores)
+        score_cache.set(*field, result)
 
         return result
 
@@ -88,6 +461,7 @@ class UserAnswer(TimeStampedModel):
     user = models.ForeignKey(UserModel, on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     answer = models.ManyToManyField(Answer)
+    score = models.FloatField(null=True, blank=True)
 
     class Meta:
         constraints = [
@@ -99,30 +473,224 @@ class UserAnswer(TimeStampedModel):
     def __str__(self) -> str:
         return str(self.question)
     
-    def get_redis_key(self):
-        return f"answer.{self.question.uuid}.{self.user.uuid}"
+    def get_cache_field(self) -> Tuple[UUID, str]:
+        return (
+            self.question.quiz_id,
+            score_cache.get_answer_field(self.question_id, self.user_id),
+        )
 
     def get_score(self):
-        if res := RedisClient.get(self.get_redis_key()):
+        if self.score is not None:
+            return self.score
+
+        if getattr(self, "_cached_score", None) is not None:
+            return self._cached_score
+
+        field = self.get_cache_field()
+        if (res := score_cache.get(*field)) is not None:
             return res
 
-        total_answers = self.question.answer_set.all()
-        correct_answers = total_answers.filter(is_answer=True)
-        correct_answers_count = correct_answers.count()
-        weight = 0
-        unit_weight_gain = round(1 / correct_answers_count, 2)
-        unit_weight_loss = round(1 / total_answers.filter(is_answer=False).count(), 2)
-
-        if correct_answers_count == 1 == self.answer.all().count():
-            weight += self.answer.all().first().is_answer
-
-        else:
-            for answer in self.answer.all():
-                if correct_answers.filter(uuid=answer.uuid).exists():
-                    weight += unit_weight_gain
-                else:
-                    weight -= unit_weight_loss
-        
-        RedisClient.set(self.get_redis_key(), weight)
+        weight = UserAnswer.get_scores([self])[self.pk]
+        score_cache.set(*field, weight)
         
         return weight
+
+    @staticmethod
+    def get_scores(user_answers: Iterable["UserAnswer"]) -> Dict[UUID, float]:
+        """
+        Grade many user answers at once, keyed by the uuid of the user answer.
+        Costs two queries whatever the number of user answers.
+        """
+        user_answers = list(user_answers)
+        if not user_answers:
+            return {}
+
+        answer_keys = Question.get_answer_keys(
+            user_answer.question_id for user_answer in user_answers
+        )
+        selections = defaultdict(set)
+        for user_answer_id, answer_id in UserAnswer.answer.through.objects.filter(
+            useranswer__in=[user_answer.pk for user_answer in user_answers]
+        ).values_list("useranswer", "answer"):
+            selections[user_answer_id].add(answer_id)
+
+        return {
+            user_answer.pk: score_selection(
+                answer_keys.get(user_answer.question_id, AnswerKey.from_rows(())),
+                selections[user_answer.pk],
+            )
+            for user_answer in user_answers
+        }
+
+
+class QuestionStatistics(TimeStampedModel):
+    """
+    Running sums over every submission answering a question, enough to read
+    its difficulty and discrimination without replaying the submissions
+    """
+
+    question = models.OneToOneField(
+        Question, on_delete=models.CASCADE, related_name="statistics"
+    )
+    takers = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_square_sum = models.FloatField(default=0)
+    total_sum = models.FloatField(default=0)
+    total_square_sum = models.FloatField(default=0)
+    score_total_sum = models.FloatField(default=0)
+
+    def __str__(self) -> str:
+        return str(self.question)
+
+    def get_difficulty(self) -> Optional[float]:
+        """
+        The share of takers that answered the question fully correctly
+        """
+        if not self.takers:
+            return None
+        return self.correct / self.takers
+
+    def get_discrimination(self) -> Optional[float]:
+        """
+        The correlation between the score on the question and the score on
+        the whole quiz, None while it is undefined
+        """
+        n = self.takers
+        variance = (n * self.score_square_sum - self.score_sum**2) * (
+            n * self.total_square_sum - self.total_sum**2
+        )
+        if n < 2 or variance <= 0:
+            return None
+        return (n * self.score_total_sum - self.score_sum * self.total_sum) / math.sqrt(
+            variance
+        )
+
+    @staticmethod
+    def record(
+        scores: Dict[UUID, float],
+        total: float,
+        answer_ids: Iterable[UUID],
+        correct: Iterable[UUID],
+    ):
+        """
+        Add a submission with `scores` keyed by question, a quiz score of
+        `total`, the picked `answer_ids` and the uuids of the questions answered
+        fully `correct`. Costs four queries whatever the number of questions.
+        """
+        answer_ids = set(answer_ids)
+        correct = set(correct)
+
+        def by_question(values: Dict[UUID, float], output_field) -> Case:
+            return Case(
+                *(When(question=key, then=Value(value)) for key, value in values.items()),
+                output_field=output_field,
+            )
+
+        QuestionStatistics.objects.bulk_create(
+            [QuestionStatistics(question_id=question_id) for question_id in scores],
+            ignore_conflicts=True,
+        )
+        QuestionStatistics.objects.filter(question__in=scores).update(
+            takers=F("takers") + 1,
+            correct=F("correct")
+            + by_question(
+                {key: int(key in correct) for key in scores},
+                models.IntegerField(),
+            ),
+            score_sum=F("score_sum") + by_question(scores, models.FloatField()),
+            score_square_sum=F("score_square_sum")
+            + by_question(
+                {key: score**2 for key, score in scores.items()}, models.FloatField()
+            ),
+            total_sum=F("total_sum") + total,
+            total_square_sum=F("total_square_sum") + total**2,
+            score_total_sum=F("score_total_sum")
+            + by_question(
+                {key: score * total for key, score in scores.items()},
+                models.FloatField(),
+            ),
+        )
+
+        if answer_ids:
+            AnswerStatistics.objects.bulk_create(
+                [AnswerStatistics(answer_id=answer_id) for answer_id in answer_ids],
+                ignore_conflicts=True,
+            )
+            AnswerStatistics.objects.filter(answer__in=answer_ids).update(
+                picks=F("picks") + 1
+            )
+
+    @staticmethod
+    def rebuild(quiz_id: UUID):
+        """
+        Recompute the statistics of a quiz from every stored submission
+        """
+        score_table = QuizTaken.get_score_table(quiz_id)
+        answer_keys = Answer.objects.filter(quiz=quiz_id).answer_keys()
+        questions = defaultdict(QuestionStatistics)
+        picks = defaultdict(int)
+        for user_id, rows in score_table.answers.items():
+            total = score_table.totals[user_id]
+            for row in rows:
+                statistics = questions[row["question"]]
+                statistics.question_id = row["question"]
+                score = row["score"]
+                statistics.takers += 1
+                statistics.correct += is_fully_correct(
+                    answer_keys.get(row["question"], AnswerKey.from_rows(())),
+                    row["answer"],
+                )
+                statistics.score_sum += score
+                statistics.score_square_sum += score**2
+                statistics.total_sum += total
+                statistics.total_square_sum += total**2
+                statistics.score_total_sum += score * total
+                for answer_id in row["answer"]:
+                    picks[answer_id] += 1
+
+        QuestionStatistics.objects.filter(question__quiz=quiz_id).delete()
+        AnswerStatistics.objects.filter(answer__quiz=quiz_id).delete()
+        QuestionStatistics.objects.bulk_create(questions.values())
+        AnswerStatistics.objects.bulk_create(
+            AnswerStatistics(answer_id=answer_id, picks=count)
+            for answer_id, count in picks.items()
+        )
+
+
+class AnswerStatistics(TimeStampedModel):
+    """
+    How many submissions picked an answer
+    """
+
+    answer = models.OneToOneField(
+        Answer, on_delete=models.CASCADE, related_name="statistics"
+    )
+    picks = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return str(self.answer)
+
+
+class Submission(TimeStampedModel):
+    """
+    A quiz submission stored as sent, waiting to be graded by a worker
+    """
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE)
+    payload = models.JSONField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.quiz_id} | {self.status}"
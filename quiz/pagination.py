@@ -0,0 +1,247 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib import parse
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """
+    The number of rows Postgres expects a queryset to return: `reltuples` of
+    the table when the queryset is unfiltered, the row estimate of its plan
+    otherwise, 0 when it cannot match any row. None on other databases or when
+    the table was never analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            if row is not None and row[0] >= 0:
+                return int(row[0])
+
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountMixin:
+    """
+    Count with `estimate_count` and only run an exact COUNT when the estimate
+    is below `PAGINATION_EXACT_COUNT_THRESHOLD`. Responses tell whether the
+    count is exact in `count_exact`.
+    """
+
+    def get_count(self, queryset) -> int:
+        self.count, self.count_exact = self.get_count_with_accuracy(queryset)
+        return self.count
+
+    def get_count_with_accuracy(self, queryset) -> Tuple[int, bool]:
+        estimate = estimate_count(queryset)
+        if estimate is None or estimate < settings.PAGINATION_EXACT_COUNT_THRESHOLD:
+            return queryset.count(), True
+        return estimate, False
+
+    def add_count_schema(self, schema: dict) -> dict:
+        schema["properties"] = {
+            "count": {"type": "integer", "example": 123},
+            "count_exact": {"type": "boolean"},
+            **schema["properties"],
+        }
+        return schema
+
+
+class EstimatedCountPagination(EstimatedCountMixin, LimitOffsetPagination):
+    """
+    Limit/offset pages whose bounds never depend on the count, which may be an
+    estimate: a page fetches one extra row to tell whether another follows.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.get_count(queryset)
+        self.offset = self.get_offset(request)
+        self.request = request
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        page = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("count_exact", self.count_exact),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return self.add_count_schema(super().get_paginated_response_schema(schema))
+
+
+class KeysetPagination(EstimatedCountMixin, BasePagination):
+    """
+    Paginate newest first on `(created, uuid)`, the position of a page being
+    the key of its last row rather than an offset, so any page costs one
+    index range scan. Cursors are opaque and stay valid when rows are
+    inserted in front of them. Only the first page is counted, `count` and
+    `count_exact` are null on the pages reached through a cursor.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.start(request)
+        if self.cursor is None:
+            self.get_count(queryset)
+        return self.set_page(list(self.get_page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.start(request)
+        if self.cursor is None:
+            await sync_to_async(self.get_count)(queryset)
+        return self.set_page([row async for row in self.get_page_queryset(queryset)])
+
+    def start(self, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.count = self.count_exact = None
+
+    def get_page_queryset(self, queryset):
+        reverse = False
+        if self.cursor is not None:
+            reverse, created, uuid = self.cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created__gt=created) | Q(created=created, uuid__gt=uuid)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created__lt=created) | Q(created=created, uuid__lt=uuid)
+                )
+
+        ordering = ("created", "uuid") if reverse else ("-created", "-uuid")
+        return queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def set_page(self, rows):
+        reverse = self.cursor is not None and self.cursor[0]
+        self.page = rows
+        has_more = len(self.page) > self.page_size
+        del self.page[self.page_size :]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode()).decode())
+            created = parse_datetime(tokens["p"][0])
+            uuid = UUID(tokens["u"][0])
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, created, uuid
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        tokens = {"p": instance.created.isoformat(), "u": str(instance.uuid)}
+        if reverse:
+            tokens["r"] = "1"
+
+        encoded = b64encode(parse.urlencode(tokens).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data) -> OrderedDict:
+        return OrderedDict(
+            [
+                ("count", self.count),
+                ("count_exact", self.count_exact),
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]
+        )
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        schema = self.add_count_schema(
+            {
+                "type": "object",
+                "properties": {
+                    "next": {"type": "string", "nullable": True},
+                    "previous": {"type": "string", "nullable": True},
+                    "results": schema,
+                },
+            }
+        )
+        for name in ("count", "count_exact"):
+            schema["properties"][name]["nullable"] = True
+        return schema
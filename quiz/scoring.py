@@ -0,0 +1,200 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, FrozenSet, Optional, Tuple
+from uuid import UUID
+
+
+class AnswerKey(NamedTuple):
+    """
+    The answers of a single question split into correct and incorrect uuids
+    """
+
+    correct: FrozenSet[UUID]
+    incorrect: FrozenSet[UUID]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[UUID, bool]]) -> "AnswerKey":
+        correct, incorrect = set(), set()
+        for uuid, is_answer in rows:
+            (correct if is_answer else incorrect).add(uuid)
+        return cls(frozenset(correct), frozenset(incorrect))
+
+
+def score_selection(key: AnswerKey, selection: Iterable[UUID]) -> float:
+    """
+    Grade the answers picked by a user against the answer key of the question.
+
+    A question with a single correct answer answered with a single pick scores
+    1 or 0. Otherwise every correct pick gains `1 / correct` and every other
+    pick loses `1 / incorrect`, both rounded to two decimal places.
+    """
+    selection = set(selection)
+    right = len(selection & key.correct)
+    return score_counts(key, right, len(selection) - right)
+
+
+def is_fully_correct(key: AnswerKey, selection: Iterable[UUID]) -> bool:
+    """
+    Whether the answers picked are exactly the correct answers of the question.
+    Scores are summed from rounded weights so they cannot tell this apart.
+    """
+    return bool(key.correct) and set(selection) == key.correct
+
+
+def score_counts(key: AnswerKey, right: int, wrong: int) -> float:
+    """
+    Grade a selection from the number of correct and incorrect picks in it
+    """
+    if len(key.correct) == 1 == right + wrong:
+        return right
+
+    weight = 0
+
+    # unit weights are only computed when used so questions without
+    # correct (or incorrect) answers do not divide by zero
+    if right:
+        weight += right * round(1 / len(key.correct), 2)
+    if wrong:
+        weight -= wrong * round(1 / len(key.incorrect), 2)
+
+    return weight
+
+
+class ScoreTable(NamedTuple):
+    """
+    Scores of every user that took a quiz. `totals` maps a user to the mean of
+    their question scores, `answers` maps a user to one row per answered
+    question shaped like the output of `QuestionScoreSerializer`.
+    """
+
+    totals: Dict[UUID, float]
+    answers: Dict[UUID, List[Dict[str, Any]]]
+
+
+def grade_quiz(
+    answer_keys: Dict[UUID, AnswerKey],
+    selections: Iterable[Tuple[UUID, UUID, Optional[UUID], Optional[float]]],
+) -> ScoreTable:
+    """
+    Grade every user of a quiz in one pass.
+
+    `selections` holds one `(user, question, answer, score)` row per picked
+    answer, in the order the questions should be listed. `score` is the score
+    already stored for the question, if any, and is used instead of grading.
+
+    The answer keys are flattened into a single correctness vector indexed by
+    answer so each row is graded by a lookup instead of a set operation.
+    """
+    is_correct = {}
+    for key in answer_keys.values():
+        is_correct.update(dict.fromkeys(key.correct, 1))
+        is_correct.update(dict.fromkeys(key.incorrect, 0))
+
+    # (user, question) -> [right, wrong, picked answers, stored score]
+    cells = defaultdict(lambda: [0, 0, [], None])
+    for user_id, question_id, answer_id, score in selections:
+        cell = cells[user_id, question_id]
+        cell[3] = score
+        if answer_id is None:
+            continue
+        right = is_correct.get(answer_id, 0)
+        cell[0] += right
+        cell[1] += 1 - right
+        cell[2].append(answer_id)
+
+    empty_key = AnswerKey(frozenset(), frozenset())
+    totals, answers = {}, defaultdict(list)
+    for (user_id, question_id), (right, wrong, picked, score) in cells.items():
+        if score is None:
+            score = score_counts(answer_keys.get(question_id, empty_key), right, wrong)
+        answers[user_id].append({
+            "answer": picked,
+            "question": question_id,
+            "score": score,
+        })
+
+    for user_id, rows in answers.items():
+        totals[user_id] = sum(row["score"] for row in rows) / len(rows)
+
+    return ScoreTable(totals, dict(answers))
+
+
+class ScoreSketch:
+    """
+    A fixed-bucket histogram of quiz scores along with their count, sum and
+    sum of squares. Sketches of any quizzes merge by adding them up, and
+    quantiles are read from the histogram to within a bucket width.
+
+    Quiz scores range from -1, every pick wrong, to 1, every pick right.
+    """
+
+    low = -1.0
+    high = 1.0
+    buckets = 40
+    width = (high - low) / buckets
+
+    def __init__(
+        self,
+        counts: Optional[List[int]] = None,
+        count: int = 0,
+        total: float = 0.0,
+        square_total: float = 0.0,
+    ):
+        self.counts = list(counts) if counts else [0] * self.buckets
+        self.count = count
+        self.total = total
+        self.square_total = square_total
+
+    @classmethod
+    def get_bucket(cls, score: float) -> int:
+        bucket = int((score - cls.low) / cls.width)
+        return min(max(bucket, 0), cls.buckets - 1)
+
+    def add(self, score: float):
+        self.counts[self.get_bucket(score)] += 1
+        self.count += 1
+        self.total += score
+        self.square_total += score**2
+
+    def merge(self, other: "ScoreSketch") -> "ScoreSketch":
+        return ScoreSketch(
+            [count + other_count for count, other_count in zip(self.counts, other.counts)],
+            self.count + other.count,
+            self.total + other.total,
+            self.square_total + other.square_total,
+        )
+
+    def get_mean(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def get_variance(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return max(self.square_total / self.count - self.get_mean() ** 2, 0.0)
+
+    def get_quantile(self, quantile: float) -> Optional[float]:
+        """
+        The score below which `quantile` of the scores fall, interpolated
+        within its bucket
+        """
+        if not self.count:
+            return None
+
+        rank = quantile * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                return self.low + self.width * (bucket + (rank - seen) / count)
+            seen += count
+        return self.high
+
+    def get_histogram(self) -> List[Dict[str, float]]:
+        return [
+            {
+                "start": round(self.low + self.width * bucket, 4),
+                "end": round(self.low + self.width * (bucket + 1), 4),
+                "count": count,
+            }
+            for bucket, count in enumerate(self.counts)
+        ]
@@ -1,27 +1,52 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.utils import IntegrityError
 
 from rest_framework import serializers, status, exceptions as errors
 from rest_framework.exceptions import ValidationError
 
-from .models import Answer, Question, Quiz, QuizTaken, UserAnswer
+from .exceptions import MAX_ANSWERS_LIMIT_REACHED, MAX_QUESTIONS_LIMIT_REACHED
+from .models import (
+    Answer,
+    Question,
+    QuestionStatistics,
+    Quiz,
+    QuizTaken,
+    Submission,
+    UserAnswer,
+)
+from .scoring import is_fully_correct, score_selection
+
+
+@contextmanager
+def raise_as_validation_error():
+    # Limits on questions and answers are enforced as rows are saved
+    try:
+        yield
+    except DjangoValidationError as error:
+        raise ValidationError(error.messages)
 
 
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
-        fields = "__all__"
+        exclude = ("quiz", "owner")
         read_only_fields = ("question",)
 
     def create(self, validated_data):
         answer = Answer(question=self.context.get("question"), **validated_data)
-        answer.save()
+        with raise_as_validation_error():
+            answer.save()
         return answer
 
 
 class PublicAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
-        exclude = ("is_answer",)
+        exclude = ("is_answer", "quiz", "owner")
 
 
 class QuestionSerializer(serializers.ModelSerializer):
@@ -29,16 +54,17 @@ class QuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
-        exclude = ("quiz",)
+        exclude = ("quiz", "owner", "answer_count")
 
+    @transaction.atomic
     def create(self, validated_data):
         quiz = self.context.get("quiz")
-        question = Question.objects.create(quiz=quiz, text=validated_data.get("text"))
+        with raise_as_validation_error():
+            question = Question.objects.create(
+                quiz=quiz, text=validated_data.get("text")
+            )
         answers = validated_data.pop("answer_set")
 
-        if len(answers) > 5:
-            raise ValidationError("Answers must not be more than 5")
-
         for answer in answers:
             serialized_answer = AnswerSerializer(
                 data={**answer}, context={"question": question}
@@ -54,13 +80,13 @@ class PublicQuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
-        fields = "__all__"
+        exclude = ("owner", "answer_count")
 
 
 class QuestionOnlySerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
-        exclude = ("quiz",)
+        exclude = ("quiz", "owner", "answer_count")
 
 
 class QuizSerializer(serializers.ModelSerializer):
@@ -68,14 +94,58 @@ class QuizSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Quiz
-        fields = "__all__"
+        exclude = ("question_count",)
         read_only_fields = ("uuid", "owner", "questions")
 
 
+class QuizTreeSerializer(serializers.ModelSerializer):
+    """
+    A whole quiz with its questions and answers, validated in memory and
+    written with one INSERT per table
+    """
+
+    questions = QuestionSerializer(source="question_set", many=True)
+
+    class Meta:
+        model = Quiz
+        exclude = ("question_count",)
+        read_only_fields = ("uuid", "owner")
+
+    def validate_questions(self, questions):
+        if len(questions) > settings.MAX_QUESTION_PER_QUIZ:
+            raise ValidationError(MAX_QUESTIONS_LIMIT_REACHED.messages)
+        for question in questions:
+            if len(question["answer_set"]) > settings.MAX_ANSWER_PER_QUESTION:
+                raise ValidationError(MAX_ANSWERS_LIMIT_REACHED.messages)
+        return questions
+
+    @transaction.atomic
+    def create(self, validated_data):
+        questions = validated_data.pop("question_set")
+        quiz = Quiz.objects.create(question_count=len(questions), **validated_data)
+
+        # `bulk_create` skips the signals copying owners and counting rows
+        question_rows, answer_rows = [], []
+        for question in questions:
+            answers = question.pop("answer_set")
+            question_row = Question(
+                quiz=quiz, owner=quiz.owner, answer_count=len(answers), **question
+            )
+            question_rows.append(question_row)
+            answer_rows.extend(
+                Answer(question=question_row, quiz=quiz, owner=quiz.owner, **answer)
+                for answer in answers
+            )
+
+        Question.objects.bulk_create(question_rows)
+        Answer.objects.bulk_create(answer_rows)
+        return quiz
+
+
 class QuizOnlySerializer(serializers.ModelSerializer):
     class Meta:
         model = Quiz
-        fields = "__all__"
+        exclude = ("question_count",)
         read_only_fields = (
             "uuid",
             "owner",
@@ -90,84 +160,175 @@ class PublicQuizSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Quiz
-        fields = "__all__"
+        exclude = ("question_count",)
 
 
 class TakenAnswerSerializer(serializers.Serializer):
     uuid = serializers.UUIDField(required=False)
-    
-    def create(self, validated_data):
-        instance = Answer.objects.filter(uuid=validated_data.get("uuid"))
-        if not instance.exists():
-            raise ValidationError("Answer does not exist")
 
-        if (result := instance.first()).question != self.context.get("question"):
-            raise ValidationError("Answer is not related to question")
-        
-        return result
 
 class SingleQuestionSerializer(serializers.Serializer):
     uuid = serializers.UUIDField(required=True)
     answers = TakenAnswerSerializer(allow_empty=False, many=True)
-    
-    def create(self, validated_data):
-        instance = Question.objects.filter(uuid=validated_data.get("uuid"))
 
-        if not instance.exists():
-            raise ValidationError("Question does not exist")
-        
-        if (instance := instance.first()).quiz != self.context.get("quiz"):
-            raise ValidationError("Question is not related to quiz")
 
-        answers = validated_data.get("answers")
+class SingleQuizSerializer(serializers.Serializer):
+    uuid = serializers.UUIDField(required=True)
+    questions = SingleQuestionSerializer(allow_empty=False, many=True)
 
-        try:
-            user_answer = UserAnswer.objects.create(
-                user=self.context.get("user"),
-                question=instance,
+    def validate_selections(self, quiz, questions, answer_questions):
+        """
+        Check every picked question and answer against the answers of the quiz.
+        Only a failing submission runs extra queries, to explain what is wrong.
+        """
+        question_ids = [question.get("uuid") for question in questions]
+        if len(set(question_ids)) < len(question_ids):
+            raise ValidationError("Question is answered more than once")
+
+        unknown_questions = set(question_ids) - set(answer_questions.values())
+        if unknown_questions:
+            quiz_ids = dict(
+                Question.objects.filter(uuid__in=unknown_questions).values_list(
+                    "uuid", "quiz"
+                )
             )
+            if len(quiz_ids) < len(unknown_questions):
+                raise ValidationError("Question does not exist")
+            if any(quiz_id != quiz.pk for quiz_id in quiz_ids.values()):
+                raise ValidationError("Question is not related to quiz")
 
-            for answer in answers:
-                answer_serialized = TakenAnswerSerializer(data={
-                    **answer
-                }, context={"question": instance})
-                answer_serialized.is_valid(raise_exception=True)
-                result = answer_serialized.save()
-                user_answer.answer.add(result)
-        except IntegrityError:
-            raise ValidationError("User has already answered this quiz")
-        
-        return user_answer
-
+        unknown_answers = set()
+        for question in questions:
+            for answer in question.get("answers"):
+                if answer_questions.get(answer.get("uuid")) != question.get("uuid"):
+                    unknown_answers.add(answer.get("uuid"))
+
+        if unknown_answers:
+            if Answer.objects.filter(uuid__in=unknown_answers).count() < len(
+                unknown_answers
+            ):
+                raise ValidationError("Answer does not exist")
+            raise ValidationError("Answer is not related to question")
 
-class SingleQuizSerializer(serializers.Serializer):
-    uuid = serializers.UUIDField(required=True)
-    questions = SingleQuestionSerializer(allow_empty=False, many=True)
-    
     def create(self, validated_data):
-        quiz = Quiz.objects.filter(uuid=validated_data.get("uuid"))
+        user = self.context.get("user")
+        quiz = Quiz.objects.filter(uuid=validated_data.get("uuid")).first()
 
-        if not quiz.exists():
+        if quiz is None:
             raise errors.NotFound("Quiz does not exist", code=status.HTTP_404_NOT_FOUND)
-        
-        quiz = quiz.first()
+
+        answer_keys = Answer.objects.filter(quiz=quiz).answer_keys()
+        answer_questions = {
+            answer_id: question_id
+            for question_id, key in answer_keys.items()
+            for answer_id in key.correct | key.incorrect
+        }
         questions = validated_data.get("questions")
+        self.validate_selections(quiz, questions, answer_questions)
 
+        user_answers, picked_answers, correct = [], [], []
         for question in questions:
-            question_serialized = SingleQuestionSerializer(data={
-                **question
-            }, context={"quiz": quiz, "user": self.context.get("user")})
-            question_serialized.is_valid(raise_exception=True)
-            question_serialized.save()
-        
-        QuizTaken.objects.create(
-            quiz=quiz,
-            user=self.context.get("user")
+            selection = {answer.get("uuid") for answer in question.get("answers")}
+            key = answer_keys[question.get("uuid")]
+            user_answer = UserAnswer(
+                user=user,
+                question_id=question.get("uuid"),
+                score=score_selection(key, selection),
+            )
+            if is_fully_correct(key, selection):
+                correct.append(user_answer.question_id)
+            user_answers.append(user_answer)
+            picked_answers.extend(
+                UserAnswer.answer.through(useranswer_id=user_answer.pk, answer_id=answer_id)
+                for answer_id in selection
+            )
+
+        try:
+            UserAnswer.objects.bulk_create(user_answers)
+        except IntegrityError:
+            raise ValidationError("User has already answered this quiz")
+        UserAnswer.answer.through.objects.bulk_create(picked_answers)
+
+        total = sum(user_answer.score for user_answer in user_answers) / len(
+            user_answers
+        )
+        QuizTaken.objects.create(quiz=quiz, user=user, score=total)
+        QuestionStatistics.record(
+            {user_answer.question_id: user_answer.score for user_answer in user_answers},
+            total,
+            (picked_answer.answer_id for picked_answer in picked_answers),
+            correct,
         )
 
         return validated_data
 
 
+class SubmissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Submission
+        fields = ("uuid", "quiz", "status", "error", "created", "modified")
+        read_only_fields = fields
+
+
+class AnswerAnalysisSerializer(serializers.ModelSerializer):
+    picks = serializers.SerializerMethodField()
+    pick_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Answer
+        fields = ("uuid", "text", "is_answer", "picks", "pick_rate")
+
+    def get_picks(self, instance) -> int:
+        statistics = getattr(instance, "statistics", None)
+        return statistics.picks if statistics else 0
+
+    def get_pick_rate(self, instance):
+        takers = self.context["takers"].get(instance.question_id)
+        if not takers:
+            return None
+        return self.get_picks(instance) / takers
+
+
+class QuestionAnalysisSerializer(serializers.ModelSerializer):
+    takers = serializers.SerializerMethodField()
+    difficulty = serializers.SerializerMethodField()
+    discrimination = serializers.SerializerMethodField()
+    answers = AnswerAnalysisSerializer(source="answer_set", many=True)
+
+    class Meta:
+        model = Question
+        fields = ("uuid", "text", "takers", "difficulty", "discrimination", "answers")
+
+    def get_takers(self, instance) -> int:
+        return self.context["takers"].get(instance.pk, 0)
+
+    def get_difficulty(self, instance):
+        statistics = getattr(instance, "statistics", None)
+        return statistics.get_difficulty() if statistics else None
+
+    def get_discrimination(self, instance):
+        statistics = getattr(instance, "statistics", None)
+        return statistics.get_discrimination() if statistics else None
+
+
+class ScoreDistributionSerializer(serializers.Serializer):
+    QUANTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+
+    count = serializers.IntegerField()
+    mean = serializers.FloatField(source="get_mean")
+    variance = serializers.FloatField(source="get_variance")
+    quantiles = serializers.SerializerMethodField()
+    histogram = serializers.ListField(
+        source="get_histogram", child=serializers.DictField()
+    )
+
+    def get_quantiles(self, instance):
+        return {
+            f"p{round(quantile * 100)}": instance.get_quantile(quantile)
+            for quantile in self.QUANTILES
+        }
+
+
 class TakeQuizSerializer(serializers.ModelSerializer):
     quiz = serializers.PrimaryKeyRelatedField(queryset=Quiz.objects.all())
     answers = TakenAnswerSerializer(allow_empty=False, many=True)
@@ -185,6 +346,14 @@ class QuestionScoreSerializer(serializers.ModelSerializer):
         fields = ("answer", "question", "score")
         read_only_fields = ("score",)
 
+class TotalScoreListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if self.context.get("score_table") is None:
+            data = list(data)
+            QuizTaken.prefetch_scores(data)
+        return super().to_representation(data)
+
+
 class TotalScoreSerializer(serializers.ModelSerializer):
     score = serializers.FloatField(source="get_quiz_score")
     question = QuestionScoreSerializer(source="get_user_answers", many=True)
@@ -192,4 +361,20 @@ class TotalScoreSerializer(serializers.ModelSerializer):
         model = QuizTaken
         fields = ("quiz", "user", "score", "question")
         read_only_fields = ("score", "question")
+        list_serializer_class = TotalScoreListSerializer
+
+    def to_representation(self, instance):
+        # Scores precomputed for a whole page by `QuizTaken.get_score_table`
+        score_table = self.context.get("score_table")
+        if score_table is None:
+            if not hasattr(instance, "_user_answers"):
+                QuizTaken.prefetch_scores([instance])
+            return super().to_representation(instance)
+
+        return {
+            "quiz": instance.quiz_id,
+            "user": instance.user_id,
+            "score": score_table.totals.get(instance.user_id),
+            "question": score_table.answers.get(instance.user_id, []),
+        }
 
@@ -1,13 +1,194 @@
-from django.conf import settings
-from django.core.exceptions import ValidationError
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from redis.exceptions import RedisError
 
 from . import exceptions
-from quiz.models import Quiz
+from quiz.cache import score_cache, snapshot_cache
+from quiz.distribution import distributions
+from quiz.leaderboard import leaderboard
+from quiz.models import Answer, Question, Quiz, QuizTaken, UserAnswer
 
 
-@receiver(pre_save, sender=Quiz)
-def resident_pre_save(sender, instance: Quiz, **kwargs):
-    if instance.question_set.count() > settings.MAX_QUESTION_PER_QUIZ:
+def invalidate_snapshot(quiz_id):
+    # Dropped again on commit in case a read rebuilt it from the old rows
+    snapshot_cache.delete(quiz_id)
+    transaction.on_commit(lambda: snapshot_cache.delete(quiz_id))
+
+
+def invalidate_scores(quiz_id):
+    def invalidate():
+        # Bumped once committed, so no read grades the previous answer key
+        # into the new generation. Missed bumps are left to expire with the
+        # scores cached under the previous one.
+        try:
+            score_cache.invalidate(quiz_id)
+        except RedisError:
+            pass
+
+    transaction.on_commit(invalidate)
+
+
+def has_changed(instance, field: str) -> bool:
+    loaded_values = getattr(instance, "_loaded_values", {})
+    return loaded_values.get(field, getattr(instance, field)) != getattr(instance, field)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_post_save(sender, instance: Quiz, created=False, raw=False, **kwargs):
+    if raw or created or not has_changed(instance, "owner_id"):
+        return
+
+    # The owner is copied onto every question and answer of the quiz
+    Question.objects.filter(quiz=instance.pk).update(owner=instance.owner_id)
+    Answer.objects.filter(quiz=instance.pk).update(owner=instance.owner_id)
+    instance._loaded_values["owner_id"] = instance.owner_id
+
+
+def remove_leaderboard(quiz_id):
+    def remove():
+        # Missed removals are caught up by `rebuild_leaderboards`
+        try:
+            leaderboard.remove(quiz_id)
+        except RedisError:
+            pass
+
+    transaction.on_commit(remove)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_made_private(sender, instance: Quiz, created=False, raw=False, **kwargs):
+    if raw or created or instance.public or not has_changed(instance, "public"):
+        return
+
+    # Only public quizzes are ranked
+    remove_leaderboard(instance.pk)
+    instance._loaded_values["public"] = instance.public
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_post_delete(sender, instance: Quiz, **kwargs):
+    remove_leaderboard(instance.pk)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance: Quiz, raw=False, **kwargs):
+    if raw:
+        return
+
+    invalidate_snapshot(instance.pk)
+
+
+@receiver(pre_save, sender=Question)
+def question_pre_save(sender, instance: Question, raw=False, **kwargs):
+    if not (instance._state.adding or has_changed(instance, "quiz_id")):
+        return
+
+    # Also run for fixtures, which do not carry the copied owner
+    instance.owner_id = instance.quiz.owner_id
+    # Fixtures carry their own question counts
+    if not raw and not Quiz.reserve_question(instance.quiz_id):
         raise exceptions.MAX_QUESTIONS_LIMIT_REACHED
+
+
+@receiver(post_save, sender=Question)
+def question_post_save(sender, instance: Question, raw=False, **kwargs):
+    if raw:
+        return
+
+    invalidate_scores(instance.quiz_id)
+    invalidate_snapshot(instance.quiz_id)
+
+    if has_changed(instance, "quiz_id"):
+        Answer.objects.filter(question=instance.pk).update(
+            quiz=instance.quiz_id, owner=instance.owner_id
+        )
+        Quiz.release_question(instance._loaded_values["quiz_id"])
+        invalidate_scores(instance._loaded_values["quiz_id"])
+        invalidate_snapshot(instance._loaded_values["quiz_id"])
+        instance._loaded_values["quiz_id"] = instance.quiz_id
+
+
+@receiver(post_delete, sender=Question)
+def question_post_delete(sender, instance: Question, **kwargs):
+    Quiz.release_question(instance.quiz_id)
+    invalidate_scores(instance.quiz_id)
+    invalidate_snapshot(instance.quiz_id)
+    QuizTaken.objects.filter(quiz=instance.quiz_id).update(score=None)
+
+
+@receiver(pre_save, sender=Answer)
+def answer_pre_save(sender, instance: Answer, raw=False, **kwargs):
+    if not (instance._state.adding or has_changed(instance, "question_id")):
+        return
+
+    # Also run for fixtures, which do not carry the copied quiz and owner
+    instance.quiz_id = instance.question.quiz_id
+    instance.owner_id = instance.question.owner_id
+    # Fixtures carry their own answer counts
+    if not raw and not Question.reserve_answer(instance.question_id):
+        raise exceptions.MAX_ANSWERS_LIMIT_REACHED
+
+
+# Connected before `answer_post_save`, which marks a move as handled
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(
+    sender, instance: Answer, signal=None, created=False, raw=False, **kwargs
+):
+    if raw:
+        return
+
+    moved = has_changed(instance, "question_id")
+    question_ids, quiz_ids = {instance.question_id}, {instance.quiz_id}
+    if moved:
+        question_ids.add(instance._loaded_values["question_id"])
+        quiz_ids.add(instance._loaded_values["quiz_id"])
+    for quiz_id in quiz_ids:
+        invalidate_snapshot(quiz_id)
+
+    # Text edits leave the answer key alone
+    if signal is post_save and not (
+        created or moved or has_changed(instance, "is_answer")
+    ):
+        return
+
+    # Stored scores were graded against the previous answer key
+    for quiz_id in quiz_ids:
+        invalidate_scores(quiz_id)
+    UserAnswer.objects.filter(question__in=question_ids).update(score=None)
+    QuizTaken.objects.filter(quiz__in=quiz_ids).update(score=None)
+    if has_changed(instance, "is_answer"):
+        instance._loaded_values["is_answer"] = instance.is_answer
+
+
+@receiver(post_save, sender=Answer)
+def answer_post_save(sender, instance: Answer, created=False, raw=False, **kwargs):
+    if raw or created or not has_changed(instance, "question_id"):
+        return
+
+    Question.release_answer(instance._loaded_values["question_id"])
+    instance._loaded_values["question_id"] = instance.question_id
+
+
+@receiver(post_delete, sender=Answer)
+def answer_post_delete(sender, instance: Answer, **kwargs):
+    Question.release_answer(instance.question_id)
+
+
+@receiver(post_save, sender=QuizTaken)
+def quiz_taken_post_save(sender, instance: QuizTaken, created=False, raw=False, **kwargs):
+    if raw or not created or instance.score is None:
+        return
+
+    def record():
+        # Missed scores are caught up by the rebuild commands
+        try:
+            distributions.add(instance.quiz_id, instance.score)
+            if instance.quiz.public:
+                leaderboard.add(instance.quiz_id, instance.user_id, instance.score)
+        except RedisError:
+            pass
+
+    transaction.on_commit(record)
@@ -0,0 +1,83 @@
+from typing import List
+from uuid import UUID
+
+from django.db import transaction
+
+from rest_framework.exceptions import APIException
+
+from quiz.models import Submission
+from quiz.serializers import SingleQuizSerializer
+from quiz.utils import RedisClient
+
+
+QUEUE_KEY = "quiz.submissions"
+
+
+def enqueue(*submission_ids: UUID):
+    if submission_ids:
+        RedisClient.lpush(QUEUE_KEY, *(str(uuid) for uuid in submission_ids))
+
+
+def dequeue(batch_size: int, timeout: int = 0) -> List[UUID]:
+    """
+    Pop up to `batch_size` submission uuids, oldest first. Waits up to `timeout`
+    seconds for the first one when the queue is empty and `timeout` is set.
+    """
+    pipeline = RedisClient.pipeline()
+    pipeline.lrange(QUEUE_KEY, -batch_size, -1)
+    pipeline.ltrim(QUEUE_KEY, 0, -batch_size - 1)
+    uuids, _ = pipeline.execute()
+
+    if not uuids and timeout:
+        if popped := RedisClient.brpop(QUEUE_KEY, timeout=timeout):
+            uuids = [popped[1]]
+
+    return [UUID(uuid.decode()) for uuid in reversed(uuids)]
+
+
+def get_messages(detail) -> List[str]:
+    """
+    The messages of the `detail` of an `APIException`, however it is nested
+    """
+    if isinstance(detail, dict):
+        return [message for value in detail.values() for message in get_messages(value)]
+    if isinstance(detail, list):
+        return [message for value in detail for message in get_messages(value)]
+    return [str(detail)]
+
+
+def grade(submission: Submission):
+    """
+    Grade a submission like `TakeQuizAPI` would and record the outcome on it
+    """
+    serializer = SingleQuizSerializer(
+        data={"uuid": submission.quiz_id, "questions": submission.payload},
+        context={"user": submission.user},
+    )
+    try:
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+    except APIException as error:
+        submission.status = Submission.FAILED
+        submission.error = " ".join(get_messages(error.detail))
+    except Exception as error:
+        # The rest of the batch is already off the queue, so keep grading it
+        submission.status = Submission.FAILED
+        submission.error = str(error)
+    else:
+        submission.status = Submission.DONE
+
+    submission.save(update_fields=["status", "error", "modified"])
+
+
+def grade_batch(submission_ids: List[UUID]) -> int:
+    submissions = Submission.objects.filter(
+        uuid__in=submission_ids, status=Submission.PENDING
+    ).select_related("user")
+    count = 0
+    for submission in submissions:
+        grade(submission)
+        count += 1
+
+    return count
@@ -1,16 +1,52 @@
+import importlib
+import io
 import json
 import uuid
 from typing import Any, Dict
-from django.urls import reverse
-
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core import serializers
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils.http import http_date
+
+from redis.exceptions import ConnectionError as RedisConnectionError
 from rest_framework import status
-from rest_framework.test import APITestCase
-
-from quiz.models import Answer, Question, Quiz, UserAnswer, UserModel
+from rest_framework.test import APIClient, APITestCase
+
+import backend.urls
+import quiz.urls
+from quiz import submissions, views
+from quiz.cache import LocalCache, score_cache
+from quiz.distribution import distributions
+from quiz.exports import import_quiz_bank
+from quiz.leaderboard import leaderboard
+from quiz.models import (
+    Answer,
+    Question,
+    Quiz,
+    QuizTaken,
+    Submission,
+    UserAnswer,
+    UserModel,
+)
+from quiz.pagination import estimate_count
+from quiz.scoring import ScoreSketch
+from quiz.serializers import SingleQuizSerializer
 
 # Create your tests here.
 
 
+def reload_urls():
+    # The views routed in `quiz.urls` depend on settings read at import time
+    importlib.reload(quiz.urls)
+    importlib.reload(backend.urls)
+    clear_url_caches()
+
+
 class TestQuizViews(APITestCase):
     fixtures = ["quiz/tests/fixtures/fixture.json"]
 
@@ -36,13 +72,100 @@ class TestQuizViews(APITestCase):
         self.client.post(url, data={"title": "Geography", "public": True})
 
         response = self.client.get(url)
-        self.assertGreater(response.json()["count"], 0)
+        self.assertGreater(len(response.json()["results"]), 0)
         single_quiz: Dict[str, Any] = response.json()["results"][0]
         self.assertEqual(
             {"owner", "uuid", "title", "public", "created", "modified"},
             set(single_quiz.keys()),
         )
 
+    def test_quiz_list_pages_are_stable_under_inserts(self):
+        url = reverse("quiz:list-create-quiz")
+        Quiz.objects.filter(public=True).delete()
+        quizzes = [
+            str(Quiz.objects.create(owner=self.user, title="Geography", public=True).uuid)
+            for _ in range(15)
+        ]
+
+        response = self.client.get(url)
+        first_page = [quiz["uuid"] for quiz in response.json()["results"]]
+        self.assertIsNone(response.json()["previous"])
+        self.assertEqual(response.json()["count"], 15)
+        self.assertTrue(response.json()["count_exact"])
+
+        Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(response.json()["next"])
+        second_page = [quiz["uuid"] for quiz in response.json()["results"]]
+        self.assertIsNone(response.json()["next"])
+        self.assertIsNone(response.json()["count"])
+        self.assertFalse([query for query in queries if "COUNT(" in query["sql"]])
+        self.assertEqual(first_page + second_page, quizzes[::-1])
+
+        response = self.client.get(response.json()["previous"])
+        self.assertEqual(
+            [quiz["uuid"] for quiz in response.json()["results"]], first_page
+        )
+
+        response = self.client.get(url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_empty_queryset_is_estimated_without_a_query(self):
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(estimate_count(Quiz.objects.none()), 0)
+        self.assertFalse(queries)
+
+    @override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=5)
+    def test_underestimated_count_does_not_truncate_offset_pages(self):
+        for _ in range(26):
+            Quiz.objects.create(owner=self.user, title="Volcanoes")
+        url = reverse("quiz:search-quiz")
+
+        with mock.patch("quiz.pagination.estimate_count", return_value=12):
+            response = self.client.get(url, {"q": "volcano", "offset": 10})
+            self.assertEqual(len(response.json()["results"]), 10)
+            self.assertIsNotNone(response.json()["next"])
+            self.assertEqual(
+                (response.json()["count"], response.json()["count_exact"]), (12, False)
+            )
+
+            response = self.client.get(response.json()["next"])
+            self.assertEqual(len(response.json()["results"]), 6)
+            self.assertIsNone(response.json()["next"])
+
+    def test_quizzes_can_be_searched_by_title_question_and_answer(self):
+        user = UserModel.objects.get(email="main@email.com")
+        by_title = Quiz.objects.create(owner=self.user, title="Volcanoes")
+        by_question = Quiz.objects.create(owner=user, title="Geography", public=True)
+        Question.objects.create(quiz=by_question, text="Where is Etna?")
+        by_answer = Quiz.objects.create(owner=user, title="History", public=True)
+        Answer.objects.create(
+            question=Question.objects.create(quiz=by_answer, text="Random"),
+            text="Pompeii, under the volcano",
+        )
+        hidden = Quiz.objects.create(owner=user, title="Volcanoes")
+        Question.objects.create(quiz=hidden, text="Where is Etna?")
+        url = reverse("quiz:search-quiz")
+
+        def search(text):
+            response = self.client.get(url, {"q": text})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return {quiz["uuid"] for quiz in response.json()["results"]}
+
+        self.assertEqual(search("volcano"), {str(by_title.uuid), str(by_answer.uuid)})
+        self.assertEqual(search("Etna"), {str(by_question.uuid)})
+        self.assertEqual(search(""), set())
+        self.assertEqual(search("?!"), set())
+
+        # Queries without words match nothing and are never sent to the planner
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            response = self.client.get(url, {"q": ""})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.json()["count"], response.json()["results"]), (0, [])
+        )
+
     def test_single_quiz_can_be_retrieved(self):
         quiz = Quiz.objects.all().first()
         url = reverse("quiz:retrieve-update-destroy-quiz", kwargs={"uuid": quiz.uuid})
@@ -53,6 +176,145 @@ class TestQuizViews(APITestCase):
         )
         self.assertEqual(response.json()["uuid"], str(quiz.pk))
 
+    def test_quiz_tree_is_retrieved_in_fixed_number_of_queries(self):
+        query_counts = []
+        for question_count in (1, 4):
+            quiz = Quiz.objects.create(owner=self.user, title="Geography")
+            for _ in range(question_count):
+                question = Question.objects.create(quiz=quiz, text="Random")
+                Answer.objects.create(question=question, text="None")
+                Answer.objects.create(question=question, text="None", is_answer=True)
+
+            url = reverse(
+                "quiz:retrieve-update-destroy-quiz", kwargs={"uuid": quiz.uuid}
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()["questions"]), question_count)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_unchanged_quiz_is_not_sent_again(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        url = reverse("quiz:retrieve-update-destroy-quiz", kwargs={"uuid": quiz.uuid})
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        question.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["questions"], [])
+        self.assertNotIn("Last-Modified", response)
+
+        # Only the ETag is evaluated, a date alone cannot tell a row was deleted
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unchanged_quiz_list_page_is_not_sent_again(self):
+        url = reverse("quiz:list-create-quiz")
+        Quiz.objects.filter(public=True).delete()
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse([query for query in queries if "MAX(" in query["sql"]])
+
+        quiz.title = "History"
+        quiz.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        quiz.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_unchanged_quiz_of_other_user_is_still_forbidden(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=user, title="Geography")
+        url = reverse("quiz:retrieve-update-destroy-quiz", kwargs={"uuid": quiz.uuid})
+        etag = f'"{quiz.modified.timestamp()}-1-0-0"'
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_answer_is_looked_up_and_authorized_in_one_query(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        answer = Answer.objects.create(question=question, text="None")
+        url = reverse(
+            "quiz:retrieve-update-destroy-answer",
+            kwargs={
+                "quiz__uuid": quiz.uuid,
+                "question__uuid": question.uuid,
+                "pk": answer.uuid,
+            },
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, data={"text": "Some"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lookups = [query for query in queries if query["sql"].startswith("SELECT")]
+        # the user of the token and the answer along with its quiz
+        self.assertEqual(len(lookups), 2)
+
+        self.client.force_authenticate(UserModel.objects.get(email="main@email.com"))
+        response = self.client.patch(url, data={"text": "Some"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_quiz_and_owner_are_copied_onto_questions_and_answers(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        other_quiz = Quiz.objects.create(owner=self.user, title="History")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        answer = Answer.objects.create(question=question, text="None")
+        self.assertEqual((question.owner, answer.quiz, answer.owner), (self.user, quiz, self.user))
+
+        quiz = Quiz.objects.get(pk=quiz.pk)
+        quiz.owner = user
+        quiz.save()
+        answer.refresh_from_db()
+        self.assertEqual(answer.owner, user)
+
+        question = Question.objects.get(pk=question.pk)
+        question.quiz = other_quiz
+        question.save()
+        answer.refresh_from_db()
+        self.assertEqual((answer.quiz, answer.owner), (other_quiz, self.user))
+
+        Answer.objects.filter(pk=answer.pk).update(owner=user)
+        with self.assertRaises(CommandError):
+            call_command("check_denormalized_owners", stdout=io.StringIO())
+        call_command("check_denormalized_owners", fix=True, stdout=io.StringIO())
+        call_command("check_denormalized_owners", stdout=io.StringIO())
+
+    def test_non_owner_cannot_access_question_of_private_quiz(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        url = reverse(
+            "quiz:public-retrieve-question",
+            kwargs={"quiz__uuid": quiz.uuid, "uuid": question.uuid},
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_non_owner_cannot_access_sensitive_question_details_in_quiz(self):
         user = UserModel.objects.get(email="main@email.com")
         access_token = self.client.post(
@@ -73,6 +335,25 @@ class TestQuizViews(APITestCase):
         self.assertEqual(response.json()["uuid"], str(quiz.pk))
         self.assertNotIn("is_answer", response.json()["questions"][0]["answers"][0])
 
+    def test_public_quiz_is_served_from_snapshot_with_etag(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        question = Question.objects.create(quiz=quiz, text="Random")
+        url = reverse("quiz:public-retrieve-quiz", kwargs={"uuid": quiz.uuid})
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["questions"][0]["uuid"], str(question.uuid))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Answer.objects.create(question=question, text="None")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["questions"][0]["answers"]), 1)
+
     def test_non_owner_cannot_access_sensitive_question_details(self):
         user = UserModel.objects.get(email="main@email.com")
         access_token = self.client.post(
@@ -164,6 +445,118 @@ class TestQuizViews(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.json()[0], "Answers must not be more than 5")
+        self.assertFalse(Question.objects.filter(text="What is the meaning of RPG?"))
+
+    def test_quiz_cannot_have_more_questions_than_the_limit(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        for _ in range(10):
+            Question.objects.create(quiz=quiz, text="Where is Lagos?")
+        url = reverse("quiz:create-question", kwargs={"uuid": str(quiz.uuid)})
+        response = self.client.post(
+            url,
+            data=json.dumps({"text": "Where is Abuja?", "answers": [{"text": "Nigeria"}]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()[0], "Number of questions per quiz cannot be greater than 10"
+        )
+        self.assertEqual(quiz.question_set.count(), 10)
+
+        quiz.question_set.first().delete()
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.question_count, 9)
+
+    def test_quiz_save_does_not_count_questions_or_overwrite_the_count(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        stale = Quiz.objects.get(pk=quiz.pk)
+        question = Question.objects.create(quiz=quiz, text="Where is Lagos?")
+        Answer.objects.create(question=question, text="Nigeria")
+
+        stale.title = "History"
+        with CaptureQueriesContext(connection) as queries:
+            stale.save()
+
+        self.assertFalse([query for query in queries if "COUNT" in query["sql"]])
+        quiz.refresh_from_db()
+        self.assertEqual((quiz.title, quiz.question_count), ("History", 1))
+        question.refresh_from_db()
+        self.assertEqual(question.answer_count, 1)
+
+    def test_failed_insert_gives_back_its_reserved_slot(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Where is Lagos?")
+
+        with self.assertRaises(IntegrityError):
+            Answer.objects.create(question=question, text=None)
+        with self.assertRaises(IntegrityError):
+            Question.objects.create(quiz=quiz, text=None)
+
+        question.refresh_from_db()
+        self.assertEqual(question.answer_count, 0)
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.question_count, 1)
+
+    def test_quiz_tree_is_created_in_fixed_number_of_queries(self):
+        url = reverse("quiz:bulk-create-quiz")
+        query_counts = []
+        for question_count in (1, 4):
+            data = {
+                "title": "Geography",
+                "public": True,
+                "questions": [
+                    {
+                        "text": f"Where is city {number}?",
+                        "answers": [
+                            {"text": "Nigeria", "is_answer": True},
+                            {"text": "Ghana"},
+                        ],
+                    }
+                    for number in range(question_count)
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    url, data=json.dumps(data), content_type="application/json"
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.json()["questions"]), question_count)
+            self.assertEqual(len(response.json()["questions"][0]["answers"]), 2)
+            query_counts.append(len(queries))
+
+            quiz = Quiz.objects.get(pk=response.json()["uuid"])
+            self.assertEqual(quiz.owner, self.user)
+            self.assertEqual(quiz.question_count, question_count)
+            self.assertEqual(
+                set(Answer.objects.filter(quiz=quiz).values_list("owner", flat=True)),
+                {self.user.pk},
+            )
+            self.assertEqual(
+                set(quiz.question_set.values_list("answer_count", flat=True)), {2}
+            )
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_quiz_tree_over_the_limits_is_not_created(self):
+        url = reverse("quiz:bulk-create-quiz")
+        data = {
+            "title": "Capitals",
+            "questions": [
+                {"text": "Where is Lagos?", "answers": [{"text": "Nigeria"}] * 6}
+            ],
+        }
+
+        response = self.client.post(
+            url, data=json.dumps(data), content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["questions"], ["Answers must not be more than 5"]
+        )
+        self.assertFalse(Quiz.objects.filter(title="Capitals"))
 
     def test_question_can_be_updated(self):
         quiz = Quiz.objects.filter(owner=self.user).first()
@@ -213,7 +606,7 @@ class TestQuizViews(APITestCase):
             text="What is this?"
         )
         url = reverse("quiz:create-answer", kwargs={
-            "question__quiz__uuid": str(quiz.uuid),
+            "quiz__uuid": str(quiz.uuid),
             "question__uuid": str(question.uuid)
         })
         data = {
@@ -242,7 +635,7 @@ class TestQuizViews(APITestCase):
             text="Answer 1"
         )
         url = reverse("quiz:retrieve-update-destroy-answer", kwargs={
-            "question__quiz__uuid": str(quiz.uuid),
+            "quiz__uuid": str(quiz.uuid),
             "question__uuid": str(question.uuid),
             "pk": str(answer.uuid)
         })
@@ -258,6 +651,45 @@ class TestQuizViews(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json()['uuid'], str(answer.uuid))
 
+    def test_editing_answer_key_invalidates_scores(self):
+        quiz = Quiz.objects.filter(owner=self.user).first()
+        question = Question.objects.create(quiz=quiz, text="Random")
+        picked = Answer.objects.create(question=question, text="None")
+        Answer.objects.create(question=question, text="None", is_answer=True)
+
+        user_answer = UserAnswer.objects.create(user=self.user, question=question)
+        user_answer.answer.add(picked)
+        self.assertEqual(0, user_answer.get_score())
+
+        url = reverse("quiz:retrieve-update-destroy-answer", kwargs={
+            "quiz__uuid": str(quiz.uuid),
+            "question__uuid": str(question.uuid),
+            "pk": str(picked.uuid)
+        })
+        generation = score_cache.get_generation(quiz.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, data={"is_answer": True})
+            # Reads before the commit still see the previous answer key
+            self.assertEqual(score_cache.get_generation(quiz.pk), generation)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_answer = UserAnswer.objects.get(pk=user_answer.pk)
+        self.assertEqual(0.5, user_answer.get_score())
+
+        # Text edits keep the stored scores
+        user_answer.score = 0.5
+        user_answer.save()
+        response = self.client.patch(url, data={"text": "Edited"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(UserAnswer.objects.get(pk=user_answer.pk).score, 0.5)
+
+        # Answer writes do not depend on Redis being up
+        with mock.patch.object(
+            score_cache.client, "incr", side_effect=RedisConnectionError
+        ), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, data={"is_answer": False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_answer_can_be_deleted(self):
         quiz = Quiz.objects.filter(owner=self.user).first()
         question = Question.objects.create(
@@ -269,7 +701,7 @@ class TestQuizViews(APITestCase):
             text="Answer 1"
         )
         url = reverse("quiz:retrieve-update-destroy-answer", kwargs={
-            "question__quiz__uuid": str(quiz.uuid),
+            "quiz__uuid": str(quiz.uuid),
             "question__uuid": str(question.uuid),
             "pk": str(answer.uuid)
         })
@@ -351,6 +783,32 @@ class TestQuizViews(APITestCase):
         user_answer.save()
         self.assertEqual(1, user_answer.get_score())
 
+    def test_user_scores_for_many_questions_are_graded_in_bulk(self):
+        quiz = Quiz.objects.filter(owner=self.user).first()
+        user_answers = []
+        for correct_count in (1, 2):
+            question = Question.objects.create(quiz=quiz, text="Random")
+            correct = [
+                Answer.objects.create(question=question, text="None", is_answer=True)
+                for _ in range(correct_count)
+            ]
+            wrong = [
+                Answer.objects.create(question=question, text="None")
+                for _ in range(4 - correct_count)
+            ]
+            user_answer = UserAnswer.objects.create(
+                user=self.user,
+                question=question,
+            )
+            user_answer.answer.add(correct[0], wrong[0])
+            user_answers.append(user_answer)
+
+        with self.assertNumQueries(2):
+            scores = UserAnswer.get_scores(user_answers)
+
+        self.assertAlmostEqual(0.67, scores[user_answers[0].pk])
+        self.assertEqual(0.0, scores[user_answers[1].pk])
+
     def test_quiz_for_user_can_only_be_taken_once(self):
         user = UserModel.objects.get(email="main@email.com")
         quiz = Quiz.objects.create(
@@ -433,6 +891,680 @@ class TestQuizViews(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_scores_are_stored_when_quiz_is_taken(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(
+            owner=user,
+            title="Indemnity Quiz",
+            public=True
+        )
+        question = Question.objects.create(quiz=quiz, text="Random")
+        wrong = Answer.objects.create(question=question, text="None")
+        Answer.objects.create(question=question, text="None")
+        Answer.objects.create(question=question, text="None", is_answer=True)
+        other_question = Question.objects.create(quiz=quiz, text="Random")
+        other_right = Answer.objects.create(
+            question=other_question, text="None", is_answer=True
+        )
+        Answer.objects.create(question=other_question, text="None")
+
+        url = reverse("quiz:take-quiz", kwargs={
+            "uuid": str(quiz.uuid)
+        })
+
+        response = self.client.post(
+            url,
+            data=json.dumps({
+                "questions": [
+                    {
+                        "uuid": str(question.uuid),
+                        "answers": [{"uuid": str(wrong.uuid)}]
+                    },
+                    {
+                        "uuid": str(other_question.uuid),
+                        "answers": [{"uuid": str(other_right.uuid)}]
+                    }
+                ]
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            UserAnswer.objects.get(user=self.user, question=question).score, 0
+        )
+        self.assertEqual(
+            UserAnswer.objects.get(user=self.user, question=other_question).score, 1
+        )
+        self.assertEqual(QuizTaken.objects.get(user=self.user, quiz=quiz).score, 0.5)
+
+    def test_taking_quiz_costs_the_same_queries_whatever_its_size(self):
+        user = UserModel.objects.get(email="main@email.com")
+        query_counts = []
+        for question_count in (1, 4):
+            quiz = Quiz.objects.create(
+                owner=user,
+                title="Indemnity Quiz",
+                public=True
+            )
+            questions = []
+            for _ in range(question_count):
+                question = Question.objects.create(quiz=quiz, text="Random")
+                Answer.objects.create(question=question, text="None")
+                answer = Answer.objects.create(
+                    question=question, text="None", is_answer=True
+                )
+                questions.append({
+                    "uuid": str(question.uuid),
+                    "answers": [{"uuid": str(answer.uuid)}]
+                })
+
+            url = reverse("quiz:take-quiz", kwargs={
+                "uuid": str(quiz.uuid)
+            })
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    url,
+                    data=json.dumps({"questions": questions}),
+                    content_type='application/json'
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(QuizTaken.objects.get(quiz=quiz, user=self.user).score, 1)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_answer_from_another_question_cannot_be_picked(self):
+        quiz = Quiz.objects.filter(owner=self.user).first()
+        question = Question.objects.create(quiz=quiz, text="Random")
+        Answer.objects.create(question=question, text="None", is_answer=True)
+        other_question = Question.objects.create(quiz=quiz, text="Random")
+        other_answer = Answer.objects.create(question=other_question, text="None")
+
+        url = reverse("quiz:take-quiz", kwargs={
+            "uuid": str(quiz.uuid)
+        })
+        response = self.client.post(
+            url,
+            data=json.dumps({
+                "questions": [
+                    {
+                        "uuid": str(question.uuid),
+                        "answers": [{"uuid": str(other_answer.uuid)}]
+                    }
+                ]
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), ["Answer is not related to question"])
+        self.assertFalse(UserAnswer.objects.filter(question=question).exists())
+
+    def test_graded_quiz_is_ranked_on_leaderboards(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=user, title="Geography", public=True)
+        question = Question.objects.create(quiz=quiz, text="Random")
+        wrong = Answer.objects.create(question=question, text="None")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        leaderboard.client.delete(leaderboard.get_key())
+
+        QuizTaken.objects.create(quiz=quiz, user=user, score=0)
+        user_answer = UserAnswer.objects.create(user=user, question=question)
+        user_answer.answer.add(wrong)
+        call_command("rebuild_leaderboards", stdout=io.StringIO())
+
+        url = reverse("quiz:take-quiz", kwargs={"uuid": str(quiz.uuid)})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                url,
+                data=json.dumps({
+                    "questions": [
+                        {
+                            "uuid": str(question.uuid),
+                            "answers": [{"uuid": str(right.uuid)}]
+                        }
+                    ]
+                }),
+                content_type='application/json'
+            )
+
+        response = self.client.get(
+            reverse("quiz:leaderboard", kwargs={"quiz__uuid": quiz.uuid})
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {"rank": 1, "user": str(self.user.uuid), "score": 1},
+                {"rank": 2, "user": str(user.uuid), "score": 0},
+            ],
+        )
+
+        response = self.client.get(
+            reverse(
+                "quiz:leaderboard-around-user",
+                kwargs={"quiz__uuid": quiz.uuid, "user__uuid": user.uuid},
+            ),
+            {"radius": 0},
+        )
+        self.assertEqual(response.json()["results"][0]["rank"], 2)
+
+        response = self.client.get(
+            reverse(
+                "quiz:global-leaderboard-percentile",
+                kwargs={"user__uuid": self.user.uuid},
+            )
+        )
+        self.assertEqual(response.json()["percentile"], 50)
+
+        response = self.client.get(
+            reverse(
+                "quiz:leaderboard-percentile",
+                kwargs={"quiz__uuid": uuid.uuid4(), "user__uuid": user.uuid},
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        for limit in (0, -1):
+            response = self.client.get(
+                reverse("quiz:leaderboard", kwargs={"quiz__uuid": quiz.uuid}),
+                {"limit": limit},
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_leaderboard_is_dropped_when_quiz_is_made_private_or_deleted(self):
+        user = UserModel.objects.get(email="main@email.com")
+        leaderboard.client.delete(leaderboard.get_key())
+        quizzes = [
+            Quiz.objects.create(owner=self.user, title="Geography", public=True)
+            for _ in range(2)
+        ]
+        for public_quiz in quizzes:
+            leaderboard.add(public_quiz.pk, user.pk, 0.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz = Quiz.objects.get(pk=quizzes[0].pk)
+            quiz.public = False
+            quiz.save()
+        self.assertEqual(leaderboard.top(quiz.pk, 10), [])
+        self.assertEqual(leaderboard.top(None, 10)[0]["score"], 0.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            quizzes[1].delete()
+        self.assertEqual(leaderboard.top(None, 10)[0]["score"], 0)
+
+    def test_item_analysis_is_kept_up_to_date_by_submissions(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        easy = Question.objects.create(quiz=quiz, text="Easy")
+        easy_right = Answer.objects.create(question=easy, text="None", is_answer=True)
+        easy_wrong = Answer.objects.create(question=easy, text="None")
+        hard = Question.objects.create(quiz=quiz, text="Hard")
+        hard_right = Answer.objects.create(question=hard, text="None", is_answer=True)
+        hard_wrong = Answer.objects.create(question=hard, text="None")
+
+        url = reverse("quiz:take-quiz", kwargs={"uuid": str(quiz.uuid)})
+        for taker, picks in (
+            (self.user, {easy: easy_right, hard: hard_right}),
+            (user, {easy: easy_right, hard: hard_wrong}),
+        ):
+            self.client.force_authenticate(taker)
+            self.client.post(
+                url,
+                data=json.dumps({
+                    "questions": [
+                        {
+                            "uuid": str(question.uuid),
+                            "answers": [{"uuid": str(answer.uuid)}]
+                        }
+                        for question, answer in picks.items()
+                    ]
+                }),
+                content_type='application/json'
+            )
+        self.client.force_authenticate(self.user)
+
+        url = reverse("quiz:get-item-analysis-for-quiz", kwargs={
+            "quiz__uuid": str(quiz.uuid)
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        analysis = {question["uuid"]: question for question in response.json()}
+        self.assertEqual(analysis[str(easy.uuid)]["difficulty"], 1)
+        self.assertIsNone(analysis[str(easy.uuid)]["discrimination"])
+        self.assertEqual(analysis[str(hard.uuid)]["difficulty"], 0.5)
+        self.assertAlmostEqual(analysis[str(hard.uuid)]["discrimination"], 1)
+        self.assertEqual(
+            {
+                answer["uuid"]: answer["pick_rate"]
+                for answer in analysis[str(easy.uuid)]["answers"]
+            },
+            {str(easy_right.uuid): 1, str(easy_wrong.uuid): 0},
+        )
+
+        call_command("rebuild_item_statistics", stdout=io.StringIO())
+        self.assertEqual(self.client.get(url).json(), response.json())
+
+    def test_item_difficulty_counts_exact_selections_as_correct(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        question = Question.objects.create(quiz=quiz, text="Three right")
+        right = [
+            Answer.objects.create(question=question, text="None", is_answer=True)
+            for _ in range(3)
+        ]
+        wrong = Answer.objects.create(question=question, text="None")
+
+        url = reverse("quiz:take-quiz", kwargs={"uuid": str(quiz.uuid)})
+        # every right pick weighs 0.33, so the full selection scores 0.99
+        for taker, picks in ((self.user, right), (user, right[:2] + [wrong])):
+            self.client.force_authenticate(taker)
+            self.client.post(
+                url,
+                data=json.dumps({
+                    "questions": [
+                        {
+                            "uuid": str(question.uuid),
+                            "answers": [{"uuid": str(answer.uuid)} for answer in picks]
+                        }
+                    ]
+                }),
+                content_type='application/json'
+            )
+        self.client.force_authenticate(self.user)
+
+        url = reverse("quiz:get-item-analysis-for-quiz", kwargs={
+            "quiz__uuid": str(quiz.uuid)
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.json()[0]["difficulty"], 0.5)
+
+        call_command("rebuild_item_statistics", stdout=io.StringIO())
+        self.assertEqual(self.client.get(url).json(), response.json())
+
+    def test_score_distribution_is_kept_up_to_date(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        Answer.objects.create(question=question, text="None")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        distributions.rebuild(quiz.pk, [0, 0.5])
+
+        url = reverse("quiz:take-quiz", kwargs={"uuid": str(quiz.uuid)})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                url,
+                data=json.dumps({
+                    "questions": [
+                        {
+                            "uuid": str(question.uuid),
+                            "answers": [{"uuid": str(right.uuid)}]
+                        }
+                    ]
+                }),
+                content_type='application/json'
+            )
+
+        response = self.client.get(
+            reverse(
+                "quiz:get-score-distribution-for-quiz", kwargs={"quiz__uuid": quiz.uuid}
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 3)
+        self.assertAlmostEqual(response.json()["mean"], 0.5)
+        self.assertEqual(
+            set(response.json()["quantiles"]), {"p25", "p50", "p75", "p90", "p99"}
+        )
+
+        response = self.client.get(reverse("quiz:get-score-distribution"))
+        self.assertGreaterEqual(response.json()["count"], 3)
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_quiz_results_are_exported_as_a_stream(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        question = Question.objects.create(quiz=quiz, text="Random")
+        wrong = Answer.objects.create(question=question, text="None")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        for taker, answer in ((self.user, right), (user, wrong)):
+            user_answer = UserAnswer.objects.create(user=taker, question=question)
+            user_answer.answer.add(answer)
+            QuizTaken.objects.create(quiz=quiz, user=taker)
+
+        response = self.client.get(
+            reverse("quiz:export-scores-for-quiz-csv", kwargs={"quiz__uuid": quiz.uuid}),
+            HTTP_ACCEPT="text/csv",
+        )
+        self.assertTrue(response.streaming)
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertEqual(
+            b"".join(response.streaming_content).decode().splitlines(),
+            [
+                f"user,score,{question.uuid}",
+                f"{self.user.uuid},1.0,1",
+                f"{user.uuid},0.0,0",
+            ],
+        )
+
+        response = self.client.get(
+            reverse(
+                "quiz:export-scores-for-quiz-ndjson", kwargs={"quiz__uuid": quiz.uuid}
+            )
+        )
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            rows[0],
+            {
+                "user": str(self.user.uuid),
+                "score": 1,
+                "questions": [{"question": str(question.uuid), "score": 1}],
+            },
+        )
+
+        response = self.client.get(
+            reverse(
+                "quiz:export-scores-for-quiz-ndjson", kwargs={"quiz__uuid": quiz.uuid}
+            ),
+            HTTP_ACCEPT="text/csv",
+        )
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+        self.client.force_authenticate(user)
+        response = self.client.get(
+            reverse("quiz:export-scores-for-quiz-csv", kwargs={"quiz__uuid": quiz.uuid})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_quiz_bank_is_moved_with_commands(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        Answer.objects.create(question=question, text="None")
+        user_answer = UserAnswer.objects.create(user=self.user, question=question)
+        user_answer.answer.add(right)
+        QuizTaken.objects.create(quiz=quiz, user=self.user, score=1)
+
+        output = io.StringIO()
+        call_command("export_quizzes", quiz=[str(quiz.pk)], submissions=True, stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(
+            [json.loads(line)["model"] for line in lines],
+            ["quiz.quiz", "quiz.question", "quiz.answer", "quiz.answer",
+             "quiz.quiztaken", "quiz.useranswer"],
+        )
+
+        quiz_id = quiz.pk
+        quiz.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = import_quiz_bank(lines)
+        self.assertEqual(counts["answer"], 2)
+        quiz = Quiz.objects.get(pk=quiz_id)
+        question = Question.objects.get(pk=question.pk)
+        self.assertEqual((quiz.owner, quiz.question_count), (self.user, 1))
+        self.assertEqual((question.owner, question.answer_count), (self.user, 2))
+        self.assertEqual(
+            list(UserAnswer.objects.get(pk=user_answer.pk).answer.all()), [right]
+        )
+        self.assertEqual(QuizTaken.objects.get(quiz=quiz).score, 1)
+
+        # Rows already present are skipped
+        import_quiz_bank(lines)
+        self.assertEqual(Answer.objects.filter(quiz=quiz).count(), 2)
+
+    def test_quiz_bank_is_moved_through_the_api(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        Answer.objects.create(question=question, text="None", is_answer=True)
+
+        response = self.client.get(
+            reverse("quiz:export-quiz", kwargs={"quiz__uuid": quiz.uuid}),
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 3)
+
+        quiz_id = quiz.pk
+        quiz.delete()
+        self.client.force_authenticate(user)
+        url = reverse("quiz:import-quizzes")
+        response = self.client.post(url, data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), {"quiz": 1, "question": 1, "answer": 1})
+        self.assertEqual(Answer.objects.get(quiz=quiz_id).owner, user)
+
+        # Rows may not be added to quizzes of other users
+        self.client.force_authenticate(self.user)
+        response = self.client.post(url, data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Question.objects.get(pk=question.pk).owner, user)
+
+        response = self.client.get(reverse("quiz:export-quizzes"))
+        self.assertNotIn(str(quiz_id).encode(), b"".join(response.streaming_content))
+
+    def test_answers_imported_into_existing_question_are_counted_and_graded(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        user_answer = UserAnswer.objects.create(user=self.user, question=question, score=1)
+        user_answer.answer.add(right)
+        QuizTaken.objects.create(quiz=quiz, user=self.user, score=1)
+        generation = score_cache.get_generation(quiz.pk)
+
+        def bank(count):
+            return serializers.serialize(
+                "jsonl",
+                [Answer(question=question, text="None") for _ in range(count)],
+            ).encode()
+
+        url = reverse("quiz:import-quizzes")
+        response = self.client.post(
+            url, data=bank(9), content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Answer.objects.filter(question=question).count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url, data=bank(1), content_type="application/x-ndjson"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Question.objects.get(pk=question.pk).answer_count, 2)
+        self.assertIsNone(UserAnswer.objects.get(pk=user_answer.pk).score)
+        self.assertIsNone(QuizTaken.objects.get(quiz=quiz).score)
+        self.assertNotEqual(score_cache.get_generation(quiz.pk), generation)
+
+    @override_settings(ASYNC_SUBMISSIONS=1)
+    def test_queued_submission_is_graded_by_worker(self):
+        quiz = Quiz.objects.filter(owner=self.user).first()
+        question = Question.objects.create(quiz=quiz, text="Random")
+        Answer.objects.create(question=question, text="None")
+        answer = Answer.objects.create(question=question, text="None", is_answer=True)
+
+        url = reverse("quiz:take-quiz", kwargs={
+            "uuid": str(quiz.uuid)
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url,
+                data=json.dumps({
+                    "questions": [
+                        {
+                            "uuid": str(question.uuid),
+                            "answers": [{"uuid": str(answer.uuid)}]
+                        }
+                    ]
+                }),
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()["status"], Submission.PENDING)
+        self.assertFalse(QuizTaken.objects.filter(quiz=quiz, user=self.user).exists())
+
+        call_command("grade_submissions", once=True, stdout=io.StringIO())
+
+        url = reverse("quiz:retrieve-submission", kwargs={
+            "quiz__uuid": str(quiz.uuid),
+            "uuid": response.json()["uuid"]
+        })
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["status"], Submission.DONE)
+        self.assertEqual(QuizTaken.objects.get(quiz=quiz, user=self.user).score, 1)
+
+    def test_failing_submission_does_not_stop_its_batch(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        question = Question.objects.create(quiz=quiz, text="Random")
+        answer = Answer.objects.create(question=question, text="None", is_answer=True)
+        payload = [{"uuid": str(question.uuid), "answers": [{"uuid": str(answer.uuid)}]}]
+        failing = Submission.objects.create(quiz=quiz, user=user, payload=payload)
+        passing = Submission.objects.create(quiz=quiz, user=self.user, payload=payload)
+        invalid = Submission.objects.create(
+            quiz=quiz,
+            user=self.user,
+            payload=[{"uuid": str(uuid.uuid4()), "answers": [{"uuid": str(answer.uuid)}]}],
+        )
+
+        save = SingleQuizSerializer.save
+
+        def save_or_fail(serializer, **kwargs):
+            if serializer.context["user"] == user:
+                raise IntegrityError("duplicate key value")
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(
+            SingleQuizSerializer, "save", autospec=True, side_effect=save_or_fail
+        ):
+            self.assertEqual(
+                submissions.grade_batch([failing.pk, passing.pk, invalid.pk]), 3
+            )
+
+        failing.refresh_from_db()
+        passing.refresh_from_db()
+        invalid.refresh_from_db()
+        self.assertEqual(
+            (invalid.status, invalid.error), (Submission.FAILED, "Question does not exist")
+        )
+        self.assertEqual(
+            (failing.status, failing.error), (Submission.FAILED, "duplicate key value")
+        )
+        self.assertEqual(passing.status, Submission.DONE)
+        self.assertEqual(QuizTaken.objects.get(quiz=quiz, user=self.user).score, 1)
+
+    def test_async_views_are_routed_and_exempt_from_csrf_checks(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        question = Question.objects.create(quiz=quiz, text="Random")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        url = reverse("quiz:take-quiz", kwargs={"uuid": quiz.uuid})
+        client = APIClient(enforce_csrf_checks=True)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+        self.addCleanup(reload_urls)
+        with override_settings(ASYNC_VIEWS=1):
+            reload_urls()
+            self.assertIs(resolve(url).func.view_class, views.AsyncTakeQuizAPI)
+            response = client.post(
+                url,
+                data=json.dumps({
+                    "questions": [
+                        {"uuid": str(question.uuid), "answers": [{"uuid": str(right.uuid)}]}
+                    ]
+                }),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(QuizTaken.objects.get(quiz=quiz, user=self.user).score, 1)
+
+    def test_async_views_answer_like_their_sync_variants(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography", public=True)
+        question = Question.objects.create(quiz=quiz, text="Random")
+        Answer.objects.create(question=question, text="None")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+        factory = RequestFactory(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+        def call(view, url, data=None, **kwargs):
+            if data is None:
+                request = factory.get(url)
+            else:
+                request = factory.post(
+                    url, data=json.dumps(data), content_type="application/json"
+                )
+            return async_to_sync(view.as_view())(request, **kwargs)
+
+        url = reverse("quiz:take-quiz", kwargs={"uuid": quiz.uuid})
+        data = {
+            "questions": [
+                {"uuid": str(question.uuid), "answers": [{"uuid": str(right.uuid)}]}
+            ]
+        }
+        response = call(views.AsyncTakeQuizAPI, url, data, uuid=quiz.uuid)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(QuizTaken.objects.get(quiz=quiz, user=self.user).score, 1)
+        response = call(views.AsyncTakeQuizAPI, url, data, uuid=quiz.uuid)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for view, name, kwargs in (
+            (
+                views.AsyncGetScoreForUserAPI,
+                "quiz:get-score-for-user",
+                {"quiz__uuid": quiz.uuid, "user__uuid": self.user.uuid},
+            ),
+            (
+                views.AsyncGetScoresForQuizAPI,
+                "quiz:get-score-for-quiz",
+                {"quiz__uuid": quiz.uuid},
+            ),
+            (
+                views.AsyncPublicRetrieveQuizAPI,
+                "quiz:public-retrieve-quiz",
+                {"uuid": quiz.uuid},
+            ),
+        ):
+            url = reverse(name, kwargs=kwargs)
+            response = call(view, url, **kwargs)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), self.client.get(url).json())
+
+        request = RequestFactory().get(url)
+        response = async_to_sync(views.AsyncPublicRetrieveQuizAPI.as_view())(
+            request, uuid=quiz.uuid
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", response)
+
+        response = call(views.AsyncPublicRetrieveQuizAPI, url, uuid=uuid.uuid4())
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_scores_are_prefetched_through_the_async_cache_client(self):
+        quiz = Quiz.objects.create(owner=self.user, title="Geography")
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(quiz=quiz, text="Random")
+            wrong = Answer.objects.create(question=question, text="None")
+            right = Answer.objects.create(question=question, text="None", is_answer=True)
+        user_answer = UserAnswer.objects.create(user=self.user, question=question)
+        user_answer.answer.add(right, wrong)
+        quiz_taken = QuizTaken.objects.create(quiz=quiz, user=self.user)
+
+        async_to_sync(QuizTaken.aprefetch_scores)([quiz_taken])
+        self.assertEqual(quiz_taken.get_quiz_score(), 0)
+        score_cache.local.clear()
+        self.assertEqual(score_cache.get(*quiz_taken.get_cache_field()), 0)
+
+        quiz_taken = QuizTaken.objects.get(pk=quiz_taken.pk)
+        async_to_sync(QuizTaken.aprefetch_scores)([quiz_taken])
+        self.assertEqual(quiz_taken._cached_score, 0)
+
     def test_user_can_view_scores_after_taking_test(self):
         user = UserModel.objects.get(email="main@email.com")
         quiz = Quiz.objects.create(
@@ -513,6 +1645,45 @@ class TestQuizViews(APITestCase):
             {"quiz", "user", "score", "question"}
         )
 
+    def test_scores_missing_from_results_are_graded_and_cached(self):
+        quiz = Quiz.objects.filter(owner=self.user).first()
+        # Also moves the quiz to a fresh score-cache generation
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(quiz=quiz, text="Random")
+            for _ in range(3):
+                Answer.objects.create(question=question, text="None")
+            answer_4 = Answer.objects.create(question=question, text="None")
+            answer_5 = Answer.objects.create(
+                question=question, text="None", is_answer=True
+            )
+
+        user_answer = UserAnswer.objects.create(user=self.user, question=question)
+        user_answer.answer.add(answer_4, answer_5)
+        quiz_taken = QuizTaken.objects.create(quiz=quiz, user=self.user)
+
+        url = reverse("quiz:get-score-for-user", kwargs={
+            "quiz__uuid": str(quiz.uuid),
+            "user__uuid": str(self.user.uuid)
+        })
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["score"], 0.75)
+        self.assertEqual(response.json()["question"][0]["score"], 0.75)
+        self.assertEqual(
+            score_cache.get(*quiz_taken.get_cache_field()), 0.75
+        )
+        self.assertEqual(
+            score_cache.get(*user_answer.get_cache_field()), 0.75
+        )
+        self.assertEqual(
+            score_cache.get_all(quiz.uuid),
+            {
+                f"total.{self.user.uuid}": 0.75,
+                f"answer.{question.uuid}.{self.user.uuid}": 0.75,
+            }
+        )
+
     def test_user_cannot_view_scores_before_taking_test(self):
         user = UserModel.objects.get(email="main@email.com")
         quiz = Quiz.objects.create(
@@ -650,7 +1821,7 @@ class TestQuizViews(APITestCase):
         )
         self.assertEqual(
             set(response.json().keys()),
-            {"count", "next", "previous", "results"}
+            {"count", "count_exact", "next", "previous", "results"}
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(
@@ -662,6 +1833,39 @@ class TestQuizViews(APITestCase):
             {"quiz", "user", "score", "question"}
         )
 
+    def test_quiz_results_are_graded_for_the_whole_page(self):
+        user = UserModel.objects.get(email="main@email.com")
+        quiz = Quiz.objects.create(
+            owner=self.user,
+            title="Indemnity Quiz",
+            public=True
+        )
+        question = Question.objects.create(quiz=quiz, text="Random")
+        wrong = Answer.objects.create(question=question, text="None")
+        Answer.objects.create(question=question, text="None")
+        right = Answer.objects.create(question=question, text="None", is_answer=True)
+
+        for taker, answer in ((self.user, right), (user, wrong)):
+            user_answer = UserAnswer.objects.create(user=taker, question=question)
+            user_answer.answer.add(answer)
+            QuizTaken.objects.create(quiz=quiz, user=taker)
+
+        url = reverse("quiz:get-score-for-quiz", kwargs={
+            "quiz__uuid": str(quiz.uuid)
+        })
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        scores = {
+            result["user"]: result["score"] for result in response.json()["results"]
+        }
+        self.assertEqual(scores, {str(self.user.uuid): 1, str(user.uuid): 0})
+        self.assertEqual(
+            response.json()["results"][0]["question"][0]["question"],
+            str(question.uuid)
+        )
+
     def test_marked_as_published_cannot_be_edited(self): ...
 
     def test_other_user_cannot_view_test_results_for_other_users(self):
@@ -743,4 +1947,46 @@ class TestQuizViews(APITestCase):
             url
         )
 
-        self.assertFalse(response.json()['count'])
\ No newline at end of file
+        self.assertFalse(response.json()['results'])
+
+class TestLocalCache(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LocalCache(size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_expired_entry_is_a_miss(self):
+        cache = LocalCache(size=2, ttl=60)
+        cache.set("a", 1, ttl=-1)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.misses, 1)
+
+
+class TestScoreSketch(SimpleTestCase):
+    def test_merged_sketches_describe_all_scores(self):
+        first, second = ScoreSketch(), ScoreSketch()
+        for score in (0, 0.25):
+            first.add(score)
+        for score in (0.5, 1):
+            second.add(score)
+
+        sketch = first.merge(second)
+        self.assertEqual(sketch.count, 4)
+        self.assertAlmostEqual(sketch.get_mean(), 0.4375)
+        self.assertAlmostEqual(sketch.get_variance(), 0.1367, places=4)
+        self.assertAlmostEqual(sketch.get_quantile(0.5), 0.3, delta=sketch.width)
+        self.assertEqual(sum(bucket["count"] for bucket in sketch.get_histogram()), 4)
+
+    def test_empty_sketch_has_no_statistics(self):
+        sketch = ScoreSketch()
+
+        self.assertIsNone(sketch.get_mean())
+        self.assertIsNone(sketch.get_quantile(0.9))
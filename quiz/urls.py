@@ -1,19 +1,56 @@
+from django.conf import settings
 from django.urls import path, include
 
 from quiz import views
 
 
+if settings.ASYNC_VIEWS:
+    TakeQuizView = views.AsyncTakeQuizAPI
+    GetScoreForUserView = views.AsyncGetScoreForUserAPI
+    GetScoresForQuizView = views.AsyncGetScoresForQuizAPI
+    PublicRetrieveQuizView = views.AsyncPublicRetrieveQuizAPI
+else:
+    TakeQuizView = views.TakeQuizAPI
+    GetScoreForUserView = views.GetScoreForUserAPI
+    GetScoresForQuizView = views.GetScoresForQuizAPI
+    PublicRetrieveQuizView = views.PublicRetrieveQuizAPI
+
+
 app_name = "quiz"
 
 urlpatterns = [
     path("", views.ListCreateQuizAPI.as_view(), name="list-create-quiz"),
+    path("bulk/", views.CreateQuizTreeAPI.as_view(), name="bulk-create-quiz"),
+    path("search/", views.SearchQuizAPI.as_view(), name="search-quiz"),
+    path("export.ndjson", views.ExportQuizBankAPI.as_view(), name="export-quizzes"),
+    path("import/", views.ImportQuizBankAPI.as_view(), name="import-quizzes"),
+    path(
+        "results/distribution/",
+        views.GetScoreDistributionAPI.as_view(),
+        name="get-score-distribution",
+    ),
+    path(
+        "leaderboard/",
+        views.TopLeaderboardAPI.as_view(),
+        name="global-leaderboard",
+    ),
+    path(
+        "leaderboard/<uuid:user__uuid>/",
+        views.AroundUserLeaderboardAPI.as_view(),
+        name="global-leaderboard-around-user",
+    ),
+    path(
+        "leaderboard/<uuid:user__uuid>/percentile/",
+        views.PercentileLeaderboardAPI.as_view(),
+        name="global-leaderboard-percentile",
+    ),
     path(
         "public/",
         include(
             [
                 path(
                     "<uuid:uuid>/",
-                    views.PublicRetrieveQuizAPI.as_view(),
+                    PublicRetrieveQuizView.as_view(),
                     name="public-retrieve-quiz",
                 ),
                 path(
@@ -31,7 +68,7 @@ urlpatterns = [
     ),
     path(
         "<uuid:uuid>/take",
-        views.TakeQuizAPI.as_view(),
+        TakeQuizView.as_view(),
         name="take-quiz",
     ),
     path(
@@ -39,28 +76,75 @@ urlpatterns = [
         views.CreateQuestionAPI.as_view(),
         name="create-question",
     ),
+    path(
+        "<uuid:quiz__uuid>/submissions/<uuid:uuid>/",
+        views.RetrieveSubmissionAPI.as_view(),
+        name="retrieve-submission",
+    ),
     path(
         "<uuid:quiz__uuid>/results/",
-        views.GetScoresForQuizAPI.as_view(),
+        GetScoresForQuizView.as_view(),
         name="get-score-for-quiz"
     ),
+    path(
+        "<uuid:quiz__uuid>/export.ndjson",
+        views.ExportQuizBankAPI.as_view(),
+        name="export-quiz",
+    ),
+    path(
+        "<uuid:quiz__uuid>/results/export.csv",
+        views.ExportScoresForQuizAPI.as_view(),
+        {"format": "csv"},
+        name="export-scores-for-quiz-csv"
+    ),
+    path(
+        "<uuid:quiz__uuid>/results/export.ndjson",
+        views.ExportScoresForQuizAPI.as_view(),
+        {"format": "ndjson"},
+        name="export-scores-for-quiz-ndjson"
+    ),
+    path(
+        "<uuid:quiz__uuid>/results/distribution/",
+        views.GetScoreDistributionAPI.as_view(),
+        name="get-score-distribution-for-quiz"
+    ),
+    path(
+        "<uuid:quiz__uuid>/results/analysis/",
+        views.GetItemAnalysisForQuizAPI.as_view(),
+        name="get-item-analysis-for-quiz"
+    ),
     path(
         "<uuid:quiz__uuid>/results/<uuid:user__uuid>/",
-        views.GetScoreForUserAPI.as_view(),
+        GetScoreForUserView.as_view(),
         name="get-score-for-user"
     ),
+    path(
+        "<uuid:quiz__uuid>/leaderboard/",
+        views.TopLeaderboardAPI.as_view(),
+        name="leaderboard",
+    ),
+    path(
+        "<uuid:quiz__uuid>/leaderboard/<uuid:user__uuid>/",
+        views.AroundUserLeaderboardAPI.as_view(),
+        name="leaderboard-around-user",
+    ),
+    path(
+        "<uuid:quiz__uuid>/leaderboard/<uuid:user__uuid>/percentile/",
+        views.PercentileLeaderboardAPI.as_view(),
+        name="leaderboard-percentile",
+    ),
     path(
         "<uuid:quiz__uuid>/questions/<uuid:uuid>/",
         views.RetrieveUpdateDestroyQuestionAPI.as_view(),
         name="retrieve-update-destroy-question",
     ),
     path(
-        "<uuid:question__quiz__uuid>/questions/<uuid:question__uuid>/answers",
+        "<uuid:quiz__uuid>/questions/<uuid:question__uuid>/answers",
         views.CreateAnswerAPI.as_view(),
         name="create-answer",
     ),
     path(
-        "<uuid:question__quiz__uuid>/questions/<uuid:question__uuid>/answers/<uuid:pk>",
+        "<uuid:quiz__uuid>/questions/<uuid:question__uuid>/answers/<uuid:pk>",
         views.RetrieveUpdateDestroyAnswerAPI.as_view(),
         name="retrieve-update-destroy-answer",
     ),
@@ -1,10 +1,32 @@
+import asyncio
+import weakref
+
 from django.conf import settings
 
 import redis
+import redis.asyncio
 
 
 RedisClient = redis.Redis(
     host=settings.REDIS_HOST,
     port=settings.REDIS_PORT,
     db=0
-)
\ No newline at end of file
+)
+
+# asyncio connections belong to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """
+    The asyncio client of the running event loop, whose connection pool is
+    shared by every request the loop serves
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = redis.asyncio.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=0
+        )
+    return _async_clients[loop]
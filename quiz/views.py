@@ -1,14 +1,43 @@
+import json
+from typing import Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView, exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .mixins import MultipleFieldLookupMixin
-from .models import Answer, Question, Quiz, QuizTaken
+from . import exports, submissions
+from .cache import snapshot_cache
+from .distribution import distributions
+from .leaderboard import leaderboard
+from .mixins import ConditionalGetMixin, MultipleFieldLookupMixin
+from .models import Answer, Question, Quiz, QuizTaken, Submission
+from .pagination import KeysetPagination
+from .renderers import CSVRenderer, NDJSONRenderer
 from .permissions import (
     AdaptedMethodIsOwnerOfQuizFromQuestionOrPublic,
+    HasTakenQuiz,
     IsOwner,
     IsOwnerOfAnswerOrPublic,
     IsOwnerOfQuestion,
@@ -18,30 +47,71 @@ from .permissions import (
 from .serializers import (
     AnswerSerializer,
     PublicQuestionSerializer,
+    QuestionAnalysisSerializer,
     PublicQuizSerializer,
     QuestionOnlySerializer,
     QuestionSerializer,
     QuizOnlySerializer,
     QuizSerializer,
+    QuizTreeSerializer,
+    ScoreDistributionSerializer,
     SingleQuizSerializer,
+    SubmissionSerializer,
     TotalScoreSerializer,
 )
 
 
-class ListCreateQuizAPI(generics.ListCreateAPIView):
+# Query plans loading a quiz tree in a fixed number of queries
+ANSWERS_PLAN = Prefetch("answer_set", queryset=Answer.objects.order_by("-created"))
+QUESTIONS_PLAN = Prefetch(
+    "question_set",
+    queryset=Question.objects.order_by("-created").prefetch_related(ANSWERS_PLAN),
+)
+
+
+class ListCreateQuizAPI(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = QuizOnlySerializer
     queryset = Quiz.objects.filter(public=True)
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class RetrieveUpdateDestroyQuizAPI(generics.RetrieveUpdateDestroyAPIView):
+class CreateQuizTreeAPI(generics.CreateAPIView):
+    serializer_class = QuizTreeSerializer
+    queryset = Quiz.objects.prefetch_related(QUESTIONS_PLAN)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def create(self, request: Request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quiz = serializer.save(owner=request.user)
+        return Response(
+            data=QuizSerializer(self.get_queryset().get(pk=quiz.pk)).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class SearchQuizAPI(generics.ListAPIView):
+    serializer_class = QuizOnlySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Quiz.objects.filter(
+            Q(public=True) | Q(owner=self.request.user)
+        ).search(self.request.query_params.get("q", ""))
+
+
+class RetrieveUpdateDestroyQuizAPI(
+    ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     serializer_class = QuizSerializer
-    queryset = Quiz
+    queryset = Quiz.objects.prefetch_related(QUESTIONS_PLAN)
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     lookup_field = "uuid"
+    modified_fields = ("modified", "question__modified", "question__answer__modified")
 
     def perform_update(self, serializer):
         serializer.save(owner=self.request.user)
@@ -49,10 +119,28 @@ class RetrieveUpdateDestroyQuizAPI(generics.RetrieveUpdateDestroyAPIView):
 
 class PublicRetrieveQuizAPI(generics.RetrieveAPIView):
     serializer_class = PublicQuizSerializer
-    queryset = Quiz
+    queryset = Quiz.objects.prefetch_related(QUESTIONS_PLAN)
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "uuid"
 
+    def retrieve(self, request, *args, **kwargs):
+        # Served from the rendered snapshot, which signals drop on any change
+        snapshot = snapshot_cache.get(kwargs["uuid"])
+        if snapshot is None:
+            serializer = self.get_serializer(self.get_object())
+            snapshot = snapshot_cache.set(
+                kwargs["uuid"], JSONRenderer().render(serializer.data)
+            )
+
+        body, etag = snapshot
+        return get_conditional_response(
+            request,
+            etag=etag,
+            response=HttpResponse(
+                body, content_type="application/json", headers={"ETag": etag}
+            ),
+        )
+
 
 class CreateQuestionAPI(generics.CreateAPIView):
     serializer_class = QuestionSerializer
@@ -68,15 +156,16 @@ class CreateQuestionAPI(generics.CreateAPIView):
 
 
 class RetrieveUpdateDestroyQuestionAPI(
-    MultipleFieldLookupMixin, generics.RetrieveUpdateDestroyAPIView
+    ConditionalGetMixin, MultipleFieldLookupMixin, generics.RetrieveUpdateDestroyAPIView
 ):
     serializer_class = QuestionSerializer
-    queryset = Question
+    queryset = Question.objects.prefetch_related(ANSWERS_PLAN)
     permission_classes = [
         permissions.IsAuthenticated,
         AdaptedMethodIsOwnerOfQuizFromQuestionOrPublic,
     ]
     lookup_fields = ["quiz__uuid", "uuid"]
+    modified_fields = ("modified", "answer__modified")
 
     def get_serializer_class(self):
         if self.request.method.upper() == "GET":
@@ -84,22 +173,29 @@ class RetrieveUpdateDestroyQuestionAPI(
         return QuestionOnlySerializer
 
 
-class PublicRetrieveQuestionAPI(MultipleFieldLookupMixin, generics.RetrieveAPIView):
+class PublicRetrieveQuestionAPI(
+    ConditionalGetMixin, MultipleFieldLookupMixin, generics.RetrieveAPIView
+):
     serializer_class = PublicQuestionSerializer
-    queryset = Question
+    queryset = Question.objects.prefetch_related(ANSWERS_PLAN)
     permission_classes = [permissions.IsAuthenticated, IsOwnerOfAnswerOrPublic]
     lookup_fields = ["quiz__uuid", "uuid"]
+    modified_fields = ("modified", "answer__modified")
 
 
 class CreateAnswerAPI(MultipleFieldLookupMixin, generics.CreateAPIView):
     serializer_class = AnswerSerializer
     queryset = Answer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOfQuestion]
-    lookup_fields = ["question__quiz__uuid", "question__uuid"]
+    lookup_fields = ["quiz__uuid", "question__uuid"]
 
     def post(self, request, *args, **kwargs):
-        # get_object_or_404(Quiz, pk=kwargs.get("quiz_uuid"))
-        question = get_object_or_404(Question, pk=kwargs.get("question__uuid"))
+        question = get_object_or_404(
+            Question,
+            pk=kwargs.get("question__uuid"),
+            quiz=kwargs.get("quiz__uuid"),
+            owner=request.user,
+        )
         serializer = self.serializer_class(
             data=request.data, context={"question": question}
         )
@@ -108,11 +204,38 @@ class CreateAnswerAPI(MultipleFieldLookupMixin, generics.CreateAPIView):
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
 
-class RetrieveUpdateDestroyAnswerAPI(generics.RetrieveUpdateDestroyAPIView):
+class RetrieveUpdateDestroyAnswerAPI(
+    ConditionalGetMixin, MultipleFieldLookupMixin, generics.RetrieveUpdateDestroyAPIView
+):
     serializer_class = AnswerSerializer
     queryset = Answer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOfQuestion]
-    lookup_fields = ["question__quiz__uuid", "question__uuid"]
+    lookup_fields = ["quiz__uuid", "question__uuid", "pk"]
+
+
+@transaction.atomic
+def take_quiz(user, quiz_id, questions) -> Tuple[dict, int]:
+    """
+    Grade a submission, or queue it when `ASYNC_SUBMISSIONS` is set, returning
+    the response body and status
+    """
+    serializer = SingleQuizSerializer(
+        data={"uuid": quiz_id, "questions": questions}, context={"user": user}
+    )
+    serializer.is_valid(raise_exception=True)
+
+    if settings.ASYNC_SUBMISSIONS:
+        quiz = get_object_or_404(Quiz, pk=quiz_id)
+        submission = Submission.objects.create(
+            quiz=quiz,
+            user=user,
+            payload=serializer.initial_data.get("questions"),
+        )
+        transaction.on_commit(lambda: submissions.enqueue(submission.uuid))
+        return SubmissionSerializer(submission).data, status.HTTP_202_ACCEPTED
+
+    serializer.save()
+    return serializer.data, status.HTTP_200_OK
 
 
 class TakeQuizAPI(generics.GenericAPIView):
@@ -121,16 +244,18 @@ class TakeQuizAPI(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "uuid"
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
-
-        serializer = self.serializer_class(
-            data={"uuid": kwargs.get("uuid"), "questions": request.data.get("questions")},
-            context={"user": request.user}
+        data, status_code = take_quiz(
+            request.user, kwargs.get("uuid"), request.data.get("questions")
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        return Response(data=data, status=status_code)
+
+
+class RetrieveSubmissionAPI(MultipleFieldLookupMixin, generics.RetrieveAPIView):
+    serializer_class = SubmissionSerializer
+    queryset = Submission
+    permission_classes = [permissions.IsAuthenticated, HasTakenQuiz]
+    lookup_fields = ["quiz__uuid", "uuid"]
 
 class GetScoreForUserAPI(MultipleFieldLookupMixin, generics.RetrieveAPIView):
     serializer_class = TotalScoreSerializer
@@ -143,6 +268,305 @@ class GetScoresForQuizAPI(MultipleFieldLookupMixin, generics.ListAPIView):
     serializer_class = TotalScoreSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOfQuiz]
     lookup_fields = ["quiz__uuid"]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return QuizTaken.objects.filter(
+            quiz__owner=self.request.user, quiz__uuid=self.kwargs["quiz__uuid"]
+        )
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        score_table = QuizTaken.get_score_table(
+            kwargs["quiz__uuid"], user_ids=[taken.user_id for taken in page]
+        )
+        serializer = self.get_serializer(
+            page,
+            many=True,
+            context={**self.get_serializer_context(), "score_table": score_table},
+        )
+        return self.get_paginated_response(serializer.data)
+
+class ExportScoresForQuizAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    exporters = {
+        CSVRenderer.format: exports.render_csv,
+        NDJSONRenderer.format: exports.render_ndjson,
+    }
+
+    def get(self, request, quiz__uuid, format):
+        quiz = get_object_or_404(Quiz, pk=quiz__uuid, owner=request.user)
+        renderer = request.accepted_renderer
+        return StreamingHttpResponse(
+            self.exporters[renderer.format](quiz.pk),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="{quiz.pk}.{renderer.format}"'
+                )
+            },
+        )
+
+
+class ExportQuizBankAPI(APIView):
+    """
+    The quizzes of the user, or a single one of them, with their questions and
+    answers in the format read by `ImportQuizBankAPI`
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer]
+
+    def get(self, request, quiz__uuid=None):
+        quizzes = Quiz.objects.filter(owner=request.user)
+        if quiz__uuid is not None:
+            get_object_or_404(quizzes, pk=quiz__uuid)
+            quizzes = quizzes.filter(pk=quiz__uuid)
+        return StreamingHttpResponse(
+            exports.iter_quiz_bank(quizzes),
+            content_type="application/x-ndjson",
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="{quiz__uuid or "quizzes"}.ndjson"'
+                )
+            },
+        )
+
+
+class ImportQuizBankAPI(generics.GenericAPIView):
+    queryset = Quiz
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        # Read line by line from the request body rather than parsed at once
+        try:
+            counts = exports.import_quiz_bank(
+                request.stream or [], owner=request.user
+            )
+        except exports.BankImportError as error:
+            raise ValidationError(str(error))
+        return Response(data=counts, status=status.HTTP_201_CREATED)
+
+
+class GetScoreDistributionAPI(generics.GenericAPIView):
+    """
+    The distribution of the scores of a quiz, or of every quiz of the user
+    when the url names no quiz
+    """
+
+    serializer_class = ScoreDistributionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, quiz__uuid=None):
+        if quiz__uuid is None:
+            sketch = distributions.get_merged(
+                Quiz.objects.filter(owner=request.user).values_list("uuid", flat=True)
+            )
+        else:
+            get_object_or_404(Quiz, pk=quiz__uuid, owner=request.user)
+            sketch = distributions.get(quiz__uuid)
+
+        return Response(data=self.get_serializer(sketch).data, status=status.HTTP_200_OK)
+
+
+class GetItemAnalysisForQuizAPI(generics.ListAPIView):
+    serializer_class = QuestionAnalysisSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
 
     def get_queryset(self):
-        return QuizTaken.objects.filter(quiz__owner=self.request.user)
\ No newline at end of file
+        return (
+            Question.objects.filter(
+                quiz__owner=self.request.user, quiz__uuid=self.kwargs["quiz__uuid"]
+            )
+            .select_related("statistics")
+            .prefetch_related(
+                Prefetch(
+                    "answer_set",
+                    queryset=Answer.objects.select_related("statistics").order_by(
+                        "-created"
+                    ),
+                )
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        questions = list(self.get_queryset())
+        takers = {
+            question.pk: question.statistics.takers
+            for question in questions
+            if hasattr(question, "statistics")
+        }
+        serializer = self.get_serializer(
+            questions,
+            many=True,
+            context={**self.get_serializer_context(), "takers": takers},
+        )
+        return Response(serializer.data)
+
+
+class LeaderboardMixin:
+    """
+    Leaderboard views read from Redis only, the board of a quiz or the global
+    one when the url names no quiz
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    max_count = 100
+
+    def get_count_param(self, name: str, default: int, minimum: int = 0) -> int:
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "A whole number is required."})
+        if value < minimum:
+            raise ValidationError(
+                {name: f"Ensure this value is greater than or equal to {minimum}."}
+            )
+        return min(value, self.max_count)
+
+
+class TopLeaderboardAPI(LeaderboardMixin, generics.GenericAPIView):
+    def get(self, request, quiz__uuid=None):
+        entries = leaderboard.top(
+            quiz__uuid, self.get_count_param("limit", 10, minimum=1)
+        )
+        return Response(data={"results": entries}, status=status.HTTP_200_OK)
+
+
+class AroundUserLeaderboardAPI(LeaderboardMixin, generics.GenericAPIView):
+    def get(self, request, user__uuid, quiz__uuid=None):
+        entries = leaderboard.around(
+            quiz__uuid, user__uuid, self.get_count_param("radius", 5)
+        )
+        if entries is None:
+            raise NotFound("User is not ranked")
+        return Response(data={"results": entries}, status=status.HTTP_200_OK)
+
+
+class PercentileLeaderboardAPI(LeaderboardMixin, generics.GenericAPIView):
+    def get(self, request, user__uuid, quiz__uuid=None):
+        percentile = leaderboard.percentile(quiz__uuid, user__uuid)
+        if percentile is None:
+            raise NotFound("User is not ranked")
+        return Response(data=percentile, status=status.HTTP_200_OK)
+
+
+class AsyncAPIView(View):
+    """
+    The base of the async variants of the hot paths, for deployments behind an
+    ASGI server. DRF views are sync only, so these authenticate with the same
+    JWT backend, answer errors through DRF's exception handler and render
+    with its JSON renderer. Database work goes through Django's async ORM, or
+    `sync_to_async` where it needs a transaction.
+    """
+
+    authentication = JWTAuthentication()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Authenticated by bearer tokens rather than cookies, as DRF views are
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user_auth = await sync_to_async(self.authentication.authenticate)(request)
+            if user_auth is None:
+                raise NotAuthenticated()
+            request.user = user_auth[0]
+            return await super().dispatch(request, *args, **kwargs)
+        except (APIException, Http404) as error:
+            if isinstance(error, (AuthenticationFailed, NotAuthenticated)):
+                error.auth_header = self.authentication.authenticate_header(request)
+            response = exception_handler(error, {"view": self, "request": request})
+            return self.render(
+                response.data,
+                response.status_code,
+                {
+                    header: value
+                    for header, value in response.items()
+                    if header != "Content-Type"
+                },
+            )
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            JSONRenderer().render(data),
+            status=status_code,
+            content_type="application/json",
+            headers=headers,
+        )
+
+
+class AsyncTakeQuizAPI(AsyncAPIView):
+    async def post(self, request, uuid):
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            raise ParseError()
+        if not isinstance(payload, dict):
+            raise ParseError()
+
+        # Grading writes in a transaction, which the async ORM cannot open
+        data, status_code = await sync_to_async(take_quiz)(
+            request.user, uuid, payload.get("questions")
+        )
+        return self.render(data, status_code)
+
+
+class AsyncGetScoreForUserAPI(AsyncAPIView):
+    permission = IsOwnerOfResultsOrOwnerOfQuiz()
+
+    async def get(self, request, quiz__uuid, user__uuid):
+        try:
+            quiz_taken = await QuizTaken.objects.select_related(
+                *self.permission.select_related
+            ).aget(quiz=quiz__uuid, user=user__uuid)
+        except QuizTaken.DoesNotExist:
+            raise Http404
+
+        if not self.permission.has_object_permission(request, self, quiz_taken):
+            raise PermissionDenied()
+
+        # Reads and fills the score cache the same way as `GetScoreForUserAPI`
+        await QuizTaken.aprefetch_scores([quiz_taken])
+        return self.render(TotalScoreSerializer(quiz_taken).data)
+
+
+class AsyncGetScoresForQuizAPI(AsyncAPIView):
+    async def get(self, request, quiz__uuid):
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(
+            QuizTaken.objects.filter(quiz__owner=request.user, quiz__uuid=quiz__uuid),
+            Request(request),
+        )
+        score_table = await sync_to_async(QuizTaken.get_score_table)(
+            quiz__uuid, user_ids=[quiz_taken.user_id for quiz_taken in page]
+        )
+        serializer = TotalScoreSerializer(
+            page, many=True, context={"score_table": score_table}
+        )
+        return self.render(paginator.get_paginated_data(serializer.data))
+
+
+class AsyncPublicRetrieveQuizAPI(AsyncAPIView):
+    async def get(self, request, uuid):
+        snapshot = await snapshot_cache.aget(uuid)
+        if snapshot is None:
+            try:
+                quiz = await Quiz.objects.prefetch_related(QUESTIONS_PLAN).aget(pk=uuid)
+            except Quiz.DoesNotExist:
+                raise Http404
+            snapshot = await snapshot_cache.aset(
+                uuid, JSONRenderer().render(PublicQuizSerializer(quiz).data)
+            )
+
+        body, etag = snapshot
+        return get_conditional_response(
+            request,
+            etag=etag,
+            response=HttpResponse(
+                body, content_type="application/json", headers={"ETag": etag}
+            ),
+        )